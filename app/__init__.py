@@ -9,7 +9,8 @@ from .client import (
     EMBY_PASS,
     authenticate,
     auth_headers,
-    CLIENT_VERSION
+    CLIENT_VERSION,
+    get_pool_stats
 )
 
 from .users import (
@@ -49,7 +50,8 @@ from .music import (
     get_albums_by_artist,
     get_songs_by_album,
     get_songs_by_artist,
-    find_songs
+    find_songs,
+    count_songs
 )
 
 from .items import (
@@ -59,6 +61,7 @@ from .items import (
     remove_item_from_playlist,
     remove_item_from_collection,
     get_collections,
+    aget_collections,
     delete_collection,
     create_movie_collection,
     delete_item_by_id,
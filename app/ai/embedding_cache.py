@@ -0,0 +1,159 @@
+"""
+app/ai/embedding_cache.py - Content-addressed embedding cache (float32 memmap + SQLite index)
+"""
+
+import hashlib
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import database
+from app_state import CONFIG_DIR
+from app.logger import get_logger
+
+logger = get_logger("MixerBee.EmbeddingCache")
+
+CACHE_DIR = CONFIG_DIR / "embedding_cache"
+
+_lock = threading.Lock()
+_views: Dict[str, np.ndarray] = {}
+_stats = {"hits": 0, "misses": 0}
+
+def cache_key(model: str, document: str) -> str:
+    return hashlib.sha256(f"{model}\0{document}".encode("utf-8")).hexdigest()
+
+def _vector_file(model: str):
+    return CACHE_DIR / f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model)}.f32"
+
+def _view(model: str, dim: int, min_rows: int) -> np.ndarray:
+    """Read-only memmap of the model's vector file, reopened when it has grown past min_rows."""
+    view = _views.get(model)
+    if view is None or view.shape[0] < min_rows:
+        path = _vector_file(model)
+        rows = os.path.getsize(path) // (dim * 4)
+        view = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim))
+        _views[model] = view
+    return view
+
+def get_many(model: str, documents: Sequence[str]) -> List[Optional[np.ndarray]]:
+    """Cached vectors for each document, or None where the document has not been embedded yet."""
+    keys = [cache_key(model, doc) for doc in documents]
+    slots: Dict[str, tuple] = {}
+    with database.get_db_connection() as conn:
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = conn.execute(
+                f"SELECT key, slot, dim FROM embedding_cache WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            slots.update({row["key"]: (row["slot"], row["dim"]) for row in rows})
+    if not slots:
+        return [None] * len(keys)
+
+    dim = next(iter(slots.values()))[1]
+    with _lock:
+        view = _view(model, dim, max(slot for slot, _ in slots.values()) + 1)
+    dangling = [key for key, (slot, _) in slots.items() if slot >= view.shape[0]]
+    if dangling:
+        # Index rows pointing past the end of a truncated file; forget them so they get re-stored.
+        logger.warning(f"Dropping {len(dangling)} embedding cache entries beyond the end of the vector file.")
+        with database.get_db_connection() as conn:
+            conn.executemany("DELETE FROM embedding_cache WHERE key = ?", [(key,) for key in dangling])
+            conn.commit()
+        for key in dangling:
+            del slots[key]
+    return [np.array(view[slots[key][0]]) if key in slots else None for key in keys]
+
+def put_many(model: str, documents: Sequence[str], vectors: Sequence) -> int:
+    """Appends vectors for documents that are not cached yet. Returns how many were stored."""
+    if not documents:
+        return 0
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2 or matrix.shape[0] != len(documents):
+        raise ValueError("Expected one vector per document.")
+    dim = matrix.shape[1]
+
+    with _lock:
+        keys = [cache_key(model, doc) for doc in documents]
+        with database.get_db_connection() as conn:
+            known = set()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                known.update(row["key"] for row in conn.execute(
+                    f"SELECT key FROM embedding_cache WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ))
+            fresh = {}
+            for key, vector in zip(keys, matrix):
+                if key not in known and key not in fresh:
+                    fresh[key] = vector
+            if not fresh:
+                return 0
+
+            path = _vector_file(model)
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(path, "ab") as f:
+                size = f.tell()
+                first_slot = size // (dim * 4)
+                if size % (dim * 4):
+                    # A torn append (crash / full disk) left a partial row; drop it so slots stay aligned.
+                    logger.warning(f"Embedding cache file {path.name} has a partial row. Truncating.")
+                    f.truncate(first_slot * dim * 4)
+                    _views.pop(model, None)
+                f.write(np.stack(list(fresh.values())).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            conn.executemany(
+                "INSERT OR IGNORE INTO embedding_cache (key, model, slot, dim) VALUES (?, ?, ?, ?)",
+                [(key, model, first_slot + n, dim) for n, key in enumerate(fresh)]
+            )
+            conn.commit()
+    return len(fresh)
+
+def embed(model: str, documents: Sequence[str], embed_fn: Callable[[List[str]], Sequence]) -> List[List[float]]:
+    """
+    Embeds documents, only running embed_fn for texts that are not in the cache. Cache
+    failures never block embedding; they just fall back to embed_fn.
+    """
+    try:
+        vectors = get_many(model, documents)
+    except Exception as e:
+        logger.warning(f"Embedding cache lookup failed, embedding directly: {e}")
+        vectors = [None] * len(documents)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    _stats["hits"] += len(documents) - len(missing)
+    _stats["misses"] += len(missing)
+
+    if missing:
+        computed = embed_fn([documents[i] for i in missing])
+        for i, vector in zip(missing, computed):
+            vectors[i] = np.asarray(vector, dtype=np.float32)
+        try:
+            put_many(model, [documents[i] for i in missing], [vectors[i] for i in missing])
+        except Exception as e:
+            logger.warning(f"Could not store embeddings in cache: {e}")
+    return [vector.tolist() for vector in vectors]
+
+def clear(model: Optional[str] = None):
+    """Drops cached vectors (for one model, or all of them)."""
+    with _lock:
+        with database.get_db_connection() as conn:
+            if model:
+                conn.execute("DELETE FROM embedding_cache WHERE model = ?", (model,))
+            else:
+                conn.execute("DELETE FROM embedding_cache")
+            conn.commit()
+        models = [model] if model else [p.stem for p in CACHE_DIR.glob("*.f32")] if CACHE_DIR.exists() else []
+        for name in models:
+            _views.pop(name, None)
+            try:
+                os.remove(_vector_file(name))
+            except FileNotFoundError:
+                pass
+
+def get_stats() -> Dict[str, int]:
+    with database.get_db_connection() as conn:
+        cached = conn.execute("SELECT COUNT(*) AS n FROM embedding_cache").fetchone()["n"]
+    return {"cached": cached, **_stats}
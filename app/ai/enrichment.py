@@ -0,0 +1,274 @@
+"""
+app/ai/enrichment.py - Batched, concurrent vibe tag enrichment of the Vector DB
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Tuple
+
+import requests
+from pydantic import BaseModel
+
+import app_state
+from app.logger import get_logger, refresh_logger_level
+from .orchestrator import genai, types
+from .vector_store import bump_generation, embed_documents, media_collection, vector_document
+from . import enrichment_queue, library_stats, tag_vocabulary
+
+logger = get_logger("MixerBee.Enrichment")
+
+DEFAULT_TITLES_PER_PROMPT = 5
+DEFAULT_CONCURRENCY = 2
+WRITE_BATCH_SIZE = 50
+
+class EnrichedTitle(BaseModel):
+    n: int
+    tags: List[str]
+
+class EnrichmentBatchResult(BaseModel):
+    items: List[EnrichedTitle]
+
+ENRICHMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"n": {"type": "integer"}, "tags": {"type": "array", "items": {"type": "string"}}},
+                "required": ["n", "tags"]
+            }
+        }
+    },
+    "required": ["items"]
+}
+
+_ollama_session = requests.Session()
+_gemini_clients: Dict[str, Any] = {}
+_gemini_lock = threading.Lock()
+_run_lock = threading.Lock()
+
+def _get_gemini_client():
+    """Returns a genai.Client shared across calls for the configured API key."""
+    if not app_state.GEMINI_API_KEY:
+        raise ValueError("Gemini API Key missing")
+    with _gemini_lock:
+        if app_state.GEMINI_API_KEY not in _gemini_clients:
+            _gemini_clients.clear()
+            _gemini_clients[app_state.GEMINI_API_KEY] = genai.Client(api_key=app_state.GEMINI_API_KEY)
+        return _gemini_clients[app_state.GEMINI_API_KEY]
+
+def _build_prompt(chunk: List[Tuple[str, Dict]]) -> str:
+    listing = "\n".join(
+        f"{n}. Title: '{meta.get('name', 'Unknown')}' Summary: '{meta.get('overview', 'No summary available.')}'"
+        for n, (_, meta) in enumerate(chunk, start=1)
+    )
+    return (
+        f"Analyze each of the following {len(chunk)} titles.\n{listing}\n\n"
+        "For each title return 5-12 highly specific vibe tags in English ONLY for visual style, emotional tone, and pacing. "
+        "Avoid generic filler (e.g., 'action', 'intense', 'fast-paced') unless absolute defining traits. "
+        "Focus on unique descriptors (e.g., 'noir', 'brutalist', 'melancholic'). If a summary is brief, provide fewer tags. "
+        "Output strictly as JSON: {\"items\": [{\"n\": <title number>, \"tags\": [\"tag1\", \"tag2\"]}]} with one entry per title."
+    )
+
+def _call_ollama(prompt: str, timeout: int) -> Tuple[Dict, int]:
+    payload = {
+        "model": app_state.OLLAMA_MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a media tagging AI. Output only raw JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        "stream": False,
+        "format": ENRICHMENT_SCHEMA,
+        "options": {"temperature": 0.0}
+    }
+    resp = _ollama_session.post(f"{app_state.OLLAMA_URL}/api/chat", json=payload, timeout=timeout)
+    resp.raise_for_status()
+    result = resp.json()
+    tokens = result.get("prompt_eval_count", 0) + result.get("eval_count", 0)
+    return json.loads(result["message"]["content"]), tokens
+
+def _call_gemini(prompt: str, timeout: int) -> Tuple[Dict, int]:
+    resp = _get_gemini_client().models.generate_content(
+        model=os.environ.get("GEMINI_MODEL", "gemini-2.5-flash"),
+        contents=prompt,
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=EnrichmentBatchResult,
+            temperature=0.0
+        )
+    )
+    if not resp or not resp.parsed:
+        raise ValueError("Gemini returned invalid response.")
+    usage = getattr(resp, "usage_metadata", None)
+    tokens = (getattr(usage, "total_token_count", 0) or 0) if usage else 0
+    return resp.parsed.model_dump(), tokens
+
+def _enrich_chunk(chunk: List[Tuple[str, Dict]], timeout: int) -> Tuple[Dict[str, str], int]:
+    """Tags one multi-title prompt. Returns ({item_id: "tag, tag"}, tokens used)."""
+    prompt = _build_prompt(chunk)
+    if app_state.AI_PROVIDER == "ollama":
+        parsed, tokens = _call_ollama(prompt, timeout)
+    else:
+        parsed, tokens = _call_gemini(prompt, timeout)
+
+    tagged = {}
+    for entry in parsed.get("items", []):
+        try:
+            n = int(entry.get("n"))
+        except (TypeError, ValueError):
+            continue
+        tags = [t.strip() for t in entry.get("tags", []) if isinstance(t, str) and t.strip()]
+        if 1 <= n <= len(chunk) and tags:
+            tagged[chunk[n - 1][0]] = ", ".join(tags)
+    return tagged, tokens
+
+def _flush_updates(pending: Dict[str, list]):
+    if not pending["ids"]:
+        return
+    media_collection.update(
+        ids=pending["ids"], metadatas=pending["metadatas"], documents=pending["documents"],
+        embeddings=embed_documents(pending["documents"])
+    )
+    bump_generation()
+    enrichment_queue.mark_done(pending["ids"])
+    by_type: Dict[str, int] = {}
+    for meta, previous_tags in zip(pending["metadatas"], pending["previous_tags"]):
+        by_type[meta.get("type")] = by_type.get(meta.get("type"), 0) + 1
+        tag_vocabulary.record_tags(previous_tags, meta["vibe_tags"])
+    for media_type, count in by_type.items():
+        library_stats.record_enriched(media_type, count)
+    for key in pending:
+        pending[key] = []
+
+def _claim_items(batch_size: int) -> List[Tuple[str, Dict]]:
+    """Claims due queue entries and pairs them with their Vector DB metadata."""
+    ids = enrichment_queue.claim(batch_size)
+    if not ids:
+        return []
+    found = media_collection.get(ids=ids, include=["metadatas"])
+    metas = dict(zip(found.get("ids", []), found.get("metadatas", [])))
+
+    gone = [item_id for item_id in ids if item_id not in metas]
+    already = [item_id for item_id in ids if item_id in metas and str((metas[item_id] or {}).get("is_enriched", "False")).lower() == "true"]
+    enrichment_queue.remove(gone)
+    enrichment_queue.mark_done(already)
+    skip = set(gone) | set(already)
+    return [(item_id, metas[item_id] or {}) for item_id in ids if item_id not in skip]
+
+def process_enrichment_queue(batch_size: int, timeout: int, titles_per_prompt: int = DEFAULT_TITLES_PER_PROMPT,
+                             concurrency: int = DEFAULT_CONCURRENCY, max_requests_per_hour: int = 0,
+                             max_tokens_per_hour: int = 0) -> Dict[str, Any]:
+    """
+    Claims a batch from the persistent enrichment queue and tags it with the configured LLM.
+    Titles are sent several per prompt, prompts run concurrently, and Vector DB writes are
+    batched. Stops submitting prompts once the hourly request/token budget is used up.
+    """
+    refresh_logger_level()
+    if not _run_lock.acquire(blocking=False):
+        return {"status": "ok", "processed": 0, "success": 0, "log": ["Enrichment is already running."]}
+
+    titles_per_prompt = max(1, int(titles_per_prompt))
+    concurrency = max(1, int(concurrency))
+    logger.info(f"--- STARTING METADATA ENRICHMENT (Batch: {batch_size}, {titles_per_prompt}/prompt, concurrency {concurrency}) ---")
+
+    try:
+        enrichment_queue.reset_in_progress()
+        enrichment_queue.ensure_seeded(media_collection)
+
+        if enrichment_queue.budget_exhausted(max_requests_per_hour, max_tokens_per_hour):
+            msg = "Hourly enrichment budget is used up. Skipping this run."
+            logger.info(msg)
+            return {"status": "ok", "processed": 0, "success": 0, "log": [msg]}
+
+        items = _claim_items(batch_size)
+        if not items:
+            logger.info("Enrichment queue is empty. Library is 100% enriched.")
+            return {"status": "ok", "processed": 0, "success": 0, "log": ["Queue is empty. Library fully enriched."]}
+
+        remaining = [items[i:i + titles_per_prompt] for i in range(0, len(items), titles_per_prompt)]
+        metas = dict(items)
+
+        started = time.monotonic()
+        success_count = 0
+        total_tokens = 0
+        prompts = 0
+        failed_prompts = 0
+        budget_stopped = False
+        pending = {"ids": [], "metadatas": [], "documents": [], "previous_tags": []}
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="enrichment") as pool:
+            in_flight = {}
+            while remaining or in_flight:
+                while remaining and len(in_flight) < concurrency and not budget_stopped:
+                    if enrichment_queue.budget_exhausted(max_requests_per_hour, max_tokens_per_hour, in_flight=len(in_flight)):
+                        budget_stopped = True
+                        break
+                    chunk = remaining.pop(0)
+                    in_flight[pool.submit(_enrich_chunk, chunk, timeout)] = chunk
+                    prompts += 1
+
+                if budget_stopped and remaining:
+                    enrichment_queue.release(item_id for chunk in remaining for item_id, _ in chunk)
+                    logger.info(f"Hourly budget reached. Released {sum(len(c) for c in remaining)} items for a later run.")
+                    remaining = []
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    chunk_ids = [item_id for item_id, _ in chunk]
+                    try:
+                        tagged, tokens = future.result()
+                    except Exception as e:
+                        failed_prompts += 1
+                        enrichment_queue.record_usage(1, 0)
+                        enrichment_queue.mark_failed(chunk_ids, str(e))
+                        logger.error(f"  -> Failed to enrich {', '.join(m.get('name', 'Unknown') for _, m in chunk)}: {e}")
+                        continue
+
+                    total_tokens += tokens
+                    enrichment_queue.record_usage(1, tokens)
+                    enrichment_queue.mark_failed([i for i in chunk_ids if i not in tagged], "Model returned no tags for this title.")
+                    for item_id, vibe_tags_str in tagged.items():
+                        meta = metas[item_id]
+                        previous_tags = meta.get('vibe_tags', '')
+                        meta['is_enriched'] = True
+                        meta['vibe_tags'] = vibe_tags_str
+                        title = meta.get('name', 'Unknown')
+                        text_to_embed = vector_document(meta)
+                        pending["ids"].append(item_id)
+                        pending["metadatas"].append(meta)
+                        pending["documents"].append(text_to_embed)
+                        pending["previous_tags"].append(previous_tags)
+                        success_count += 1
+                        logger.info(f"  -> {title}: {vibe_tags_str}")
+
+                    if len(pending["ids"]) >= WRITE_BATCH_SIZE:
+                        _flush_updates(pending)
+
+        _flush_updates(pending)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        metrics = {
+            "seconds": round(elapsed, 2),
+            "prompts": prompts,
+            "failed_prompts": failed_prompts,
+            "items_per_minute": round(success_count / elapsed * 60, 1),
+            "tokens": total_tokens,
+            "tokens_per_second": round(total_tokens / elapsed, 1),
+            "budget_stopped": budget_stopped,
+        }
+        log_msg = (f"Enrichment batch complete. Successfully processed {success_count}/{len(items)} items "
+                   f"({metrics['items_per_minute']} items/min, {metrics['tokens_per_second']} tokens/s).")
+        logger.info(log_msg)
+        return {"status": "ok", "processed": len(items), "success": success_count, "metrics": metrics, "log": [log_msg]}
+    except Exception as e:
+        logger.error(f"Enrichment queue failed: {e}", exc_info=True)
+        return {"status": "error", "log": [str(e)]}
+    finally:
+        _run_lock.release()
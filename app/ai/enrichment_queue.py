@@ -0,0 +1,216 @@
+"""
+app/ai/enrichment_queue.py - Persistent enrichment work queue with retry backoff and hourly budget
+"""
+
+import time
+from typing import Dict, Iterable, List, Optional
+
+import database
+from app.logger import get_logger
+
+logger = get_logger("MixerBee.EnrichmentQueue")
+
+RECENT_PRIORITY = 10
+SEARCH_PRIORITY_BUMP = 1
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 300
+BACKOFF_MAX_SECONDS = 24 * 3600
+SEEDED_KEY = "enrichment_queue_seeded"
+
+def _chunks(ids: List[str], size: int = 500):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+def enqueue(item_ids: Iterable[str], priority: int = 0):
+    """Adds items as pending. Items already queued keep their state but can gain priority."""
+    now = time.time()
+    rows = [(item_id, priority, now, now) for item_id in item_ids]
+    if not rows:
+        return
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO enrichment_queue (item_id, priority, status, attempts, next_attempt_at, added_at, updated_at)
+            VALUES (?, ?, 'pending', 0, 0, ?, ?)
+            ON CONFLICT(item_id) DO UPDATE SET priority = MAX(priority, excluded.priority)
+            """,
+            rows
+        )
+        conn.commit()
+
+def bump_priority(item_ids: Iterable[str], amount: int = SEARCH_PRIORITY_BUMP):
+    """Raises the priority of pending items, e.g. titles that keep showing up in searches."""
+    ids = list(item_ids)
+    if not ids:
+        return
+    with database.get_db_connection() as conn:
+        for chunk in _chunks(ids):
+            placeholders = ",".join("?" * len(chunk))
+            conn.execute(
+                f"UPDATE enrichment_queue SET priority = priority + ? WHERE status = 'pending' AND item_id IN ({placeholders})",
+                [amount, *chunk]
+            )
+        conn.commit()
+
+def remove(item_ids: Iterable[str]):
+    ids = list(item_ids)
+    if not ids:
+        return
+    with database.get_db_connection() as conn:
+        for chunk in _chunks(ids):
+            conn.execute(f"DELETE FROM enrichment_queue WHERE item_id IN ({','.join('?' * len(chunk))})", chunk)
+        conn.commit()
+
+def clear():
+    with database.get_db_connection() as conn:
+        conn.execute("DELETE FROM enrichment_queue")
+        conn.commit()
+
+def ensure_seeded(collection):
+    """
+    Queues every un-enriched item in the collection once (first run / upgrade). Tracked with a
+    settings flag rather than an empty table, because indexing may enqueue new items first.
+    """
+    with database.get_db_connection() as conn:
+        if conn.execute("SELECT 1 FROM settings WHERE key = ?", (SEEDED_KEY,)).fetchone():
+            return
+    ids = []
+    for flag in (False, "False"):
+        ids.extend(collection.get(where={"is_enriched": flag}, include=[]).get("ids", []))
+    enqueue(ids)
+    with database.get_db_connection() as conn:
+        conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, '1')", (SEEDED_KEY,))
+        conn.commit()
+    logger.info(f"Seeded enrichment queue with {len(ids)} un-enriched items.")
+
+def reset_in_progress() -> int:
+    """Returns items claimed by an interrupted run to pending so the next run resumes them."""
+    with database.get_db_connection() as conn:
+        cur = conn.execute("UPDATE enrichment_queue SET status = 'pending' WHERE status = 'in_progress'")
+        conn.commit()
+    if cur.rowcount:
+        logger.info(f"Resuming {cur.rowcount} enrichment items left in progress by a previous run.")
+    return cur.rowcount
+
+def claim(limit: int) -> List[str]:
+    """Marks up to limit due items in_progress, highest priority and newest first."""
+    now = time.time()
+    with database.get_db_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT item_id FROM enrichment_queue
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY priority DESC, added_at DESC
+            LIMIT ?
+            """,
+            (now, limit)
+        ).fetchall()
+        ids = [row["item_id"] for row in rows]
+        conn.executemany(
+            "UPDATE enrichment_queue SET status = 'in_progress', updated_at = ? WHERE item_id = ?",
+            [(now, item_id) for item_id in ids]
+        )
+        conn.commit()
+    return ids
+
+def release(item_ids: Iterable[str]):
+    """Puts claimed items back without counting an attempt (e.g. budget ran out)."""
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            "UPDATE enrichment_queue SET status = 'pending' WHERE item_id = ? AND status = 'in_progress'",
+            [(item_id,) for item_id in item_ids]
+        )
+        conn.commit()
+
+def mark_done(item_ids: Iterable[str]):
+    now = time.time()
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            "UPDATE enrichment_queue SET status = 'done', last_error = NULL, updated_at = ? WHERE item_id = ?",
+            [(now, item_id) for item_id in item_ids]
+        )
+        conn.commit()
+
+def mark_failed(item_ids: Iterable[str], error: str):
+    """
+    Records a failed attempt. The item backs off exponentially and is parked as 'failed'
+    after MAX_ATTEMPTS so it stops blocking the front of the queue.
+    """
+    now = time.time()
+    with database.get_db_connection() as conn:
+        for item_id in item_ids:
+            row = conn.execute("SELECT attempts FROM enrichment_queue WHERE item_id = ?", (item_id,)).fetchone()
+            attempts = (row["attempts"] if row else 0) + 1
+            delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+            conn.execute(
+                """
+                UPDATE enrichment_queue
+                SET attempts = ?, last_error = ?, next_attempt_at = ?, updated_at = ?,
+                    status = CASE WHEN ? >= ? THEN 'failed' ELSE 'pending' END
+                WHERE item_id = ?
+                """,
+                (attempts, error[:500], now + delay, now, attempts, MAX_ATTEMPTS, item_id)
+            )
+        conn.commit()
+
+def retry_failed() -> int:
+    """Re-queues parked failures with a fresh attempt count."""
+    with database.get_db_connection() as conn:
+        cur = conn.execute(
+            "UPDATE enrichment_queue SET status = 'pending', attempts = 0, next_attempt_at = 0 WHERE status = 'failed'"
+        )
+        conn.commit()
+    return cur.rowcount
+
+def _current_hour() -> int:
+    return int(time.time() // 3600)
+
+def get_budget_usage() -> Dict[str, int]:
+    with database.get_db_connection() as conn:
+        row = conn.execute(
+            "SELECT requests, tokens FROM enrichment_budget WHERE hour = ?", (_current_hour(),)
+        ).fetchone()
+    return {"requests": row["requests"] if row else 0, "tokens": row["tokens"] if row else 0}
+
+def record_usage(requests: int, tokens: int):
+    with database.get_db_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO enrichment_budget (hour, requests, tokens) VALUES (?, ?, ?)
+            ON CONFLICT(hour) DO UPDATE SET requests = requests + excluded.requests, tokens = tokens + excluded.tokens
+            """,
+            (_current_hour(), requests, tokens)
+        )
+        conn.execute("DELETE FROM enrichment_budget WHERE hour < ?", (_current_hour() - 48,))
+        conn.commit()
+
+def budget_exhausted(max_requests_per_hour: int, max_tokens_per_hour: int, in_flight: int = 0) -> bool:
+    """True when this hour's request or token budget is used up. A limit of 0 means unlimited."""
+    if not max_requests_per_hour and not max_tokens_per_hour:
+        return False
+    usage = get_budget_usage()
+    if max_requests_per_hour and usage["requests"] + in_flight >= max_requests_per_hour:
+        return True
+    return bool(max_tokens_per_hour) and usage["tokens"] >= max_tokens_per_hour
+
+def get_status() -> Dict[str, object]:
+    """Queue counts by status, the next retry time and this hour's budget usage."""
+    with database.get_db_connection() as conn:
+        rows = conn.execute("SELECT status, COUNT(*) AS n FROM enrichment_queue GROUP BY status").fetchall()
+        next_retry: Optional[float] = conn.execute(
+            "SELECT MIN(next_attempt_at) AS t FROM enrichment_queue WHERE status = 'pending' AND next_attempt_at > ?",
+            (time.time(),)
+        ).fetchone()["t"]
+        recent_errors = conn.execute(
+            """
+            SELECT item_id, attempts, last_error FROM enrichment_queue
+            WHERE last_error IS NOT NULL AND status != 'done'
+            ORDER BY updated_at DESC LIMIT 10
+            """
+        ).fetchall()
+    return {
+        "counts": {row["status"]: row["n"] for row in rows},
+        "next_retry_at": next_retry,
+        "budget_this_hour": get_budget_usage(),
+        "recent_errors": [dict(row) for row in recent_errors],
+    }
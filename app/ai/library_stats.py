@@ -0,0 +1,105 @@
+"""
+app/ai/library_stats.py - Maintained vector DB counters (total / enriched by media type)
+"""
+
+import threading
+from typing import Dict, Iterable, Optional
+
+import database
+from app.logger import get_logger
+
+logger = get_logger("MixerBee.LibraryStats")
+
+INDEXED_TYPES = ("Movie", "Series")
+
+_recalibrate_lock = threading.Lock()
+
+def _is_enriched(meta: Optional[Dict]) -> bool:
+    return bool(meta) and str(meta.get("is_enriched", "False")).lower() == "true"
+
+def _apply(deltas: Dict[str, list]):
+    """Adds [total, enriched] deltas per media type in a single transaction."""
+    deltas = {t: d for t, d in deltas.items() if d[0] or d[1]}
+    if not deltas:
+        return
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO library_stats (media_type, total, enriched) VALUES (?, ?, ?)
+            ON CONFLICT(media_type) DO UPDATE SET
+                total = MAX(total + excluded.total, 0),
+                enriched = MAX(enriched + excluded.enriched, 0)
+            """,
+            [(t, d[0], d[1]) for t, d in deltas.items()]
+        )
+        conn.commit()
+
+def _deltas(metadatas: Iterable[Optional[Dict]], sign: int) -> Dict[str, list]:
+    deltas: Dict[str, list] = {}
+    for meta in metadatas:
+        entry = deltas.setdefault((meta or {}).get("type") or "Other", [0, 0])
+        entry[0] += sign
+        entry[1] += sign if _is_enriched(meta) else 0
+    return deltas
+
+def record_added(metadatas: Iterable[Optional[Dict]]):
+    """Counts newly inserted vector DB items."""
+    _apply(_deltas(metadatas, 1))
+
+def record_removed(metadatas: Iterable[Optional[Dict]]):
+    """Discounts deleted vector DB items, using the metadata read before deletion."""
+    _apply(_deltas(metadatas, -1))
+
+def record_enriched(media_type: Optional[str], count: int = 1):
+    """Counts items that switched from un-enriched to enriched."""
+    _apply({media_type or "Other": [0, count]})
+
+def reset():
+    """Zeroes all counters (the collection was wiped)."""
+    with database.get_db_connection() as conn:
+        conn.execute("DELETE FROM library_stats")
+        conn.commit()
+
+def recalibrate(collection) -> Dict[str, list]:
+    """Recounts from the collection using id-only queries and stores the result."""
+    counts: Dict[str, list] = {}
+    for media_type in INDEXED_TYPES:
+        total = len(collection.get(where={"type": media_type}, include=[]).get("ids", []))
+        enriched = 0
+        for flag in (True, "True"):
+            res = collection.get(where={"$and": [{"type": media_type}, {"is_enriched": flag}]}, include=[])
+            enriched += len(res.get("ids", []))
+        counts[media_type] = [total, enriched]
+
+    other = collection.count() - sum(c[0] for c in counts.values())
+    if other > 0:
+        counts["Other"] = [other, 0]
+
+    with database.get_db_connection() as conn:
+        conn.execute("DELETE FROM library_stats")
+        conn.executemany(
+            "INSERT INTO library_stats (media_type, total, enriched) VALUES (?, ?, ?)",
+            [(t, c[0], c[1]) for t, c in counts.items()]
+        )
+        conn.commit()
+    logger.info(f"Recalibrated library stats: {counts}")
+    return counts
+
+def get_stats(collection) -> Dict:
+    """
+    Returns {"total", "enriched", "by_type"} from the stored counters. If the stored total
+    disagrees with collection.count() the counters are rebuilt first.
+    """
+    with database.get_db_connection() as conn:
+        rows = conn.execute("SELECT media_type, total, enriched FROM library_stats").fetchall()
+    counts = {row["media_type"]: [row["total"], row["enriched"]] for row in rows}
+
+    if sum(c[0] for c in counts.values()) != collection.count():
+        with _recalibrate_lock:
+            counts = recalibrate(collection)
+
+    return {
+        "total": sum(c[0] for c in counts.values()),
+        "enriched": sum(c[1] for c in counts.values()),
+        "by_type": {t: {"total": c[0], "enriched": c[1]} for t, c in counts.items()},
+    }
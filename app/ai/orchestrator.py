@@ -7,6 +7,8 @@ import json
 import re
 import requests
 import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Literal, Any
 from pydantic import BaseModel, Field, field_validator, AliasChoices
 from contextvars import ContextVar
@@ -14,13 +16,15 @@ from contextvars import ContextVar
 import app_state
 from .tools import AVAILABLE_TOOLS
 from app.logger import get_logger, refresh_logger_level
-from .vector_store import media_collection
+from .vector_store import media_collection, search_by_vibes
 from models import AiTweaks
 
 logger = get_logger("MixerBee.AI")
 
 ai_tweaks_context: ContextVar[Optional[AiTweaks]] = ContextVar("ai_tweaks", default=None)
 
+TOOL_WORKERS = 4
+
 try:
     from google import genai
     from google.genai import types
@@ -90,9 +94,6 @@ class AIBlock(BaseModel):
             return [c for p in parts if (c := clean(p))]
         return []
 
-class EnrichmentResult(BaseModel):
-    tags: List[str]
-
 def _consolidate_blocks(blocks: List[Dict[str, Any]], target_size: int = 10) -> List[Dict[str, Any]]:
     if not blocks: return []
     movie_vibe = None
@@ -264,6 +265,13 @@ def _call_ollama(messages: List[Dict], tools: list = None, json_schema: Dict = N
         logger.info(json.dumps(msg["tool_calls"], indent=2))
     return result
 
+def _timed_tool(label: str, func, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        logger.info(f"--- TOOL {label} finished in {(time.perf_counter() - started) * 1000:.0f} ms ---")
+
 def _run_ollama_researcher(prompt: str, tweaks: AiTweaks) -> tuple[List[Dict[str, Any]], Dict[str, str]]:
     """
     Runs the Researcher phase and returns grouped results plus a strict ID-Type map.
@@ -287,47 +295,79 @@ def _run_ollama_researcher(prompt: str, tweaks: AiTweaks) -> tuple[List[Dict[str
     finding_groups = []
     id_type_map = {}
 
-    if "tool_calls" in message and message["tool_calls"]:
-        for call in message["tool_calls"]:
-            func_name = call["function"]["name"]
-            args = call["function"].get("arguments", {})
-            if func_name in tool_map:
+    calls = []
+    for call in message.get("tool_calls") or []:
+        func_name = call["function"]["name"]
+        args = call["function"].get("arguments", {})
+        if func_name in tool_map and isinstance(args, dict):
+            args.pop("limit", None)
+            args.pop("count", None)
+            calls.append((func_name, args))
+
+    vibe_calls = [args for func_name, args in calls if func_name == "search_by_vibe"]
+    other_calls = [(i, func_name, args) for i, (func_name, args) in enumerate(calls) if func_name != "search_by_vibe"]
+    outcomes: Dict[int, Any] = {}
+
+    if calls:
+        with ThreadPoolExecutor(max_workers=min(TOOL_WORKERS, len(other_calls) + 1), thread_name_prefix="researcher-tool") as pool:
+            vibe_future = None
+            if vibe_calls:
+                logger.info(f"--- EXECUTING {len(vibe_calls)} search_by_vibe CALLS AS ONE BATCH: {[a.get('query') for a in vibe_calls]} ---")
+                vibe_future = pool.submit(contextvars.copy_context().run, _timed_tool, "search_by_vibe (batch)", search_by_vibes, vibe_calls)
+            futures = {}
+            for i, func_name, args in other_calls:
+                logger.info(f"--- EXECUTING TOOL: {func_name} WITH ARGS: {args} ---")
+                futures[i] = pool.submit(contextvars.copy_context().run, _timed_tool, func_name, tool_map[func_name], **args)
+
+            for i, future in futures.items():
                 try:
-                    args.pop("limit", None)
-                    args.pop("count", None)
-
-                    logger.info(f"--- EXECUTING TOOL: {func_name} WITH ARGS: {args} ---")
-                    result = tool_map[func_name](**args)
-
-                    search_context = args.get("query", func_name)
-
-                    summary = f"RESEARCH FINDINGS FOR '{search_context}':\n"
-                    all_tool_results = []
-                    if isinstance(result, list):
-                        for r in result:
-                            if isinstance(r, dict):
-                                item_id = r.get("Id", "")
-                                item_type = r.get("Type", "Movie")
-                                if item_id:
-                                    id_type_map[item_id] = item_type
-                                    all_tool_results.append(r)
-                            elif isinstance(r, str):
-                                all_tool_results.append({"Id": "", "Name": r, "Type": "Series", "Year": "Unknown", "Genres": ""})
-
-                    if all_tool_results:
-                        seen_ids = set()
-                        for r in all_tool_results:
-                            item_id = r.get("Id", "")
-                            name = r.get("Name", "Unknown")
-                            dedup_key = item_id if item_id else name
-                            if dedup_key not in seen_ids:
-                                genres = r.get("Genres", "Unknown")
-                                summary += f"- ID: \"{item_id}\" | Title: \"{name} ({r.get('Year', 'Unknown')})\" | Type: {r.get('Type', 'Unknown')} | Genres: {genres}\n"
-                                seen_ids.add(dedup_key)
-
-                        finding_groups.append({"query": search_context, "context": summary})
+                    outcomes[i] = future.result()
                 except Exception as e:
-                    logger.error(f"Tool failed: {e}")
+                    outcomes[i] = e
+            if vibe_future is not None:
+                try:
+                    vibe_results = iter(vibe_future.result())
+                except Exception as e:
+                    vibe_results = iter([e] * len(vibe_calls))
+                for i, (func_name, _) in enumerate(calls):
+                    if func_name == "search_by_vibe":
+                        outcomes[i] = next(vibe_results)
+
+    for i, (func_name, args) in enumerate(calls):
+        try:
+            result = outcomes[i]
+            if isinstance(result, Exception):
+                raise result
+
+            search_context = args.get("query", func_name)
+
+            summary = f"RESEARCH FINDINGS FOR '{search_context}':\n"
+            all_tool_results = []
+            if isinstance(result, list):
+                for r in result:
+                    if isinstance(r, dict):
+                        item_id = r.get("Id", "")
+                        item_type = r.get("Type", "Movie")
+                        if item_id:
+                            id_type_map[item_id] = item_type
+                            all_tool_results.append(r)
+                    elif isinstance(r, str):
+                        all_tool_results.append({"Id": "", "Name": r, "Type": "Series", "Year": "Unknown", "Genres": ""})
+
+            if all_tool_results:
+                seen_ids = set()
+                for r in all_tool_results:
+                    item_id = r.get("Id", "")
+                    name = r.get("Name", "Unknown")
+                    dedup_key = item_id if item_id else name
+                    if dedup_key not in seen_ids:
+                        genres = r.get("Genres", "Unknown")
+                        summary += f"- ID: \"{item_id}\" | Title: \"{name} ({r.get('Year', 'Unknown')})\" | Type: {r.get('Type', 'Unknown')} | Genres: {genres}\n"
+                        seen_ids.add(dedup_key)
+
+                finding_groups.append({"query": search_context, "context": summary})
+        except Exception as e:
+            logger.error(f"Tool failed: {e}")
 
     if content.strip() and (not finding_groups or len(content) > 100):
         logger.info("Researcher provided meaningful text content. Adding to Architect context.")
@@ -335,11 +375,75 @@ def _run_ollama_researcher(prompt: str, tweaks: AiTweaks) -> tuple[List[Dict[str
 
     return finding_groups, id_type_map
 
+def _run_architect_group(group: Dict[str, str], prompt: str, builder_system: str, schema: Dict,
+                         id_type_map: Dict[str, str]) -> tuple[List[Dict[str, Any]], float]:
+    """Runs one Architect call for a findings group. Returns (frontend blocks, seconds taken)."""
+    started = time.perf_counter()
+    all_generated_blocks = []
+    query_text = group['query']
+    group_context = group['context']
+
+    logger.info(f"--- ARCHITECT PROCESSING GROUP: '{query_text}' ---")
+
+    messages = [
+        {"role": "system", "content": builder_system},
+        {"role": "user", "content": f"USER PROMPT: {prompt}\n\nCURRENT FINDINGS GROUP: {query_text}\n\n{group_context}"}
+    ]
+
+    try:
+        response = _call_ollama(messages, json_schema=schema, enable_thinking=False, phase_name=f"Architect ({query_text})", temperature=0.0)
+        raw_content = response["message"]["content"]
+        data = json.loads(raw_content)
+
+        if not data.get("blocks"):
+            logger.warning(f"Architect returned valid JSON but 0 blocks. Raw content: {raw_content}")
+
+        for b_data in data.get("blocks", []):
+            valid_movies, valid_tv = [], []
+            raw_ids = b_data.get("movie_ids", []) + b_data.get("tv_ids", [])
+
+            for rid in raw_ids:
+                actual_type = id_type_map.get(rid)
+                if actual_type == "Series" or (actual_type is None and b_data.get("block_type") == "tv"):
+                    valid_tv.append(rid)
+                else:
+                    valid_movies.append(rid)
+
+            if valid_movies or b_data.get("movie_genres"):
+                m_block = b_data.copy()
+                m_block.update({
+                    "block_type": "movie",
+                    "movie_ids": valid_movies,
+                    "tv_ids": [],
+                    "tv_shows": []
+                })
+                if (fb := _map_to_frontend_block(AIBlock(**m_block))):
+                    all_generated_blocks.append(fb)
+
+            if valid_tv or b_data.get("tv_shows"):
+                t_block = b_data.copy()
+                t_block.update({
+                    "block_type": "tv",
+                    "tv_ids": valid_tv,
+                    "movie_ids": [],
+                    "movie_genres": [],
+                    "tv_count": b_data.get("tv_count", 3)
+                })
+                if (fb := _map_to_frontend_block(AIBlock(**t_block))):
+                    all_generated_blocks.append(fb)
+
+    except Exception as e:
+        logger.error(f"Failed to process group '{query_text}': {e}")
+
+    return all_generated_blocks, time.perf_counter() - started
+
 def _generate_with_ollama(prompt: str, tweaks: AiTweaks) -> tuple[List[Dict[str, Any]], str, List[str]]:
     logger.info(f"--- STARTING DIVIDE-AND-CONQUER GENERATION: '{prompt}' ---")
 
+    started = time.perf_counter()
     finding_groups, id_type_map = _run_ollama_researcher(prompt, tweaks)
-    
+    research_seconds = time.perf_counter() - started
+
     logs = [f"Researcher initialized for: '{prompt}'"]
 
     if not finding_groups:
@@ -397,63 +501,18 @@ def _generate_with_ollama(prompt: str, tweaks: AiTweaks) -> tuple[List[Dict[str,
         "required": ["blocks"]
     }
 
-    all_generated_blocks = []
-
-    for group in finding_groups:
-        query_text = group['query']
-        group_context = group['context']
-
-        logger.info(f"--- ARCHITECT PROCESSING GROUP: '{query_text}' ---")
-
-        messages = [
-            {"role": "system", "content": builder_system},
-            {"role": "user", "content": f"USER PROMPT: {prompt}\n\nCURRENT FINDINGS GROUP: {query_text}\n\n{group_context}"}
+    parallel = min(app_state.OLLAMA_NUM_PARALLEL, len(finding_groups))
+    architect_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="architect") as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _run_architect_group, group, prompt, builder_system, schema, id_type_map)
+            for group in finding_groups
         ]
+        group_results = [future.result() for future in futures]
+    architect_seconds = time.perf_counter() - architect_started
 
-        try:
-            response = _call_ollama(messages, json_schema=schema, enable_thinking=False, phase_name=f"Architect ({query_text})", temperature=0.0)
-            raw_content = response["message"]["content"]
-            data = json.loads(raw_content)
-
-            if not data.get("blocks"):
-                logger.warning(f"Architect returned valid JSON but 0 blocks. Raw content: {raw_content}")
-
-            for b_data in data.get("blocks", []):
-                valid_movies, valid_tv = [], []
-                raw_ids = b_data.get("movie_ids", []) + b_data.get("tv_ids", [])
-
-                for rid in raw_ids:
-                    actual_type = id_type_map.get(rid)
-                    if actual_type == "Series" or (actual_type is None and b_data.get("block_type") == "tv"):
-                        valid_tv.append(rid)
-                    else:
-                        valid_movies.append(rid)
-
-                if valid_movies or b_data.get("movie_genres"):
-                    m_block = b_data.copy()
-                    m_block.update({
-                        "block_type": "movie",
-                        "movie_ids": valid_movies,
-                        "tv_ids": [],
-                        "tv_shows": []
-                    })
-                    if (fb := _map_to_frontend_block(AIBlock(**m_block))):
-                        all_generated_blocks.append(fb)
-
-                if valid_tv or b_data.get("tv_shows"):
-                    t_block = b_data.copy()
-                    t_block.update({
-                        "block_type": "tv",
-                        "tv_ids": valid_tv,
-                        "movie_ids": [],
-                        "movie_genres": [],
-                        "tv_count": b_data.get("tv_count", 3)
-                    })
-                    if (fb := _map_to_frontend_block(AIBlock(**t_block))):
-                        all_generated_blocks.append(fb)
-
-        except Exception as e:
-            logger.error(f"Failed to process group '{query_text}': {e}")
+    all_generated_blocks = [block for blocks, _ in group_results for block in blocks]
+    group_timings = ", ".join(f"'{group['query']}' {seconds:.1f}s" for group, (_, seconds) in zip(finding_groups, group_results))
 
     final_list = _consolidate_blocks(all_generated_blocks, target_size=tweaks.target_size)
 
@@ -462,6 +521,12 @@ def _generate_with_ollama(prompt: str, tweaks: AiTweaks) -> tuple[List[Dict[str,
     else:
         logs.append(f"Successfully generated {len(final_list)} consolidated blocks.")
 
+    timing = (f"Timing: research {research_seconds:.1f}s, architect {architect_seconds:.1f}s "
+              f"({len(finding_groups)} groups, {parallel} parallel: {group_timings}), "
+              f"total {time.perf_counter() - started:.1f}s.")
+    logs.append(timing)
+    logger.info(timing)
+
     logger.info(f"--- SUCCESS: Generated {len(final_list)} consolidated blocks ---")
     return final_list, f"ollama:{app_state.OLLAMA_MODEL}", logs
 
@@ -543,89 +608,3 @@ def generate_smart_blocks(prompt: str, tweaks: Optional[AiTweaks] = None) -> tup
         return _generate_with_gemini(prompt, actual_tweaks)
     finally:
         ai_tweaks_context.reset(token)
-
-def process_enrichment_queue(batch_size: int, timeout: int) -> Dict[str, Any]:
-    """Pulls a batch of un-enriched media, calls the LLM for vibe tags, and updates the Vector DB."""
-    refresh_logger_level()
-    logger.info(f"--- STARTING METADATA ENRICHMENT (Batch: {batch_size}) ---")
-
-    try:
-        unprocessed = media_collection.get(
-            where={"is_enriched": False},
-            limit=batch_size
-        )
-
-        if not unprocessed or not unprocessed['ids']:
-            logger.info("Enrichment queue is empty. Library is 100% enriched.")
-            return {"status": "ok", "processed": 0, "success": 0, "log": ["Queue is empty. Library fully enriched."]}
-
-        ids = unprocessed['ids']
-        metadatas = unprocessed['metadatas']
-        success_count = 0
-
-        for i, item_id in enumerate(ids):
-            meta = metadatas[i]
-            title = meta.get('name', 'Unknown')
-            overview = meta.get('overview', 'No summary available.')
-            logger.info(f"Enriching [{i+1}/{len(ids)}]: {title}")
-            prompt = f"Analyze Title: '{title}' Summary: '{overview}'. Return 5-12 highly specific vibe tags in English ONLY for visual style, emotional tone, and pacing. Avoid generic filler (e.g., 'action', 'intense', 'fast-paced') unless absolute defining traits. Focus on unique descriptors (e.g., 'noir', 'brutalist', 'melancholic'). If summary is brief, provide fewer tags. Output strictly as JSON: {{\"tags\": [\"tag1\", \"tag2\"]}}."
-
-            schema = {
-                "type": "object",
-                "properties": {"tags": {"type": "array", "items": {"type": "string"}}},
-                "required": ["tags"]
-            }
-
-            try:
-                vibe_tags_str = ""
-                if app_state.AI_PROVIDER == "ollama":
-                    messages = [
-                        {"role": "system", "content": "You are a media tagging AI. Output only raw JSON."},
-                        {"role": "user", "content": prompt}
-                    ]
-                    url = f"{app_state.OLLAMA_URL}/api/chat"
-                    payload = {
-                        "model": app_state.OLLAMA_MODEL,
-                        "messages": messages,
-                        "stream": False,
-                        "format": schema,
-                        "options": {"temperature": 0.0}
-                    }
-                    resp = requests.post(url, json=payload, timeout=timeout)
-                    resp.raise_for_status()
-                    result = resp.json()
-                    content = result["message"]["content"]
-                    parsed = json.loads(content)
-                    vibe_tags_str = ", ".join(parsed.get("tags", []))
-                else:
-                    if not app_state.GEMINI_API_KEY: raise ValueError("Gemini API Key missing")
-                    model_name = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
-                    client = genai.Client(api_key=app_state.GEMINI_API_KEY)
-                    resp = client.models.generate_content(
-                        model=model_name,
-                        contents=prompt,
-                        config=types.GenerateContentConfig(
-                            response_mime_type="application/json",
-                            response_schema=EnrichmentResult,
-                            temperature=0.0
-                        )
-                    )
-                    if not resp or not resp.parsed: raise ValueError("Gemini returned invalid response.")
-                    vibe_tags_str = ", ".join(resp.parsed.tags)
-
-                if vibe_tags_str:
-                    meta['is_enriched'] = True
-                    meta['vibe_tags'] = vibe_tags_str
-                    text_to_embed = f"Title: {title}. Year: {meta.get('year')}. Type: {meta.get('type')}. Genres: {meta.get('genres')}. Style: {vibe_tags_str}. Summary: {overview}"
-                    media_collection.update(ids=[item_id], metadatas=[meta], documents=[text_to_embed])
-                    success_count += 1
-                    logger.info(f"  -> Tags: {vibe_tags_str}")
-            except Exception as e:
-                logger.error(f"  -> Failed to enrich {title}: {e}")
-
-        log_msg = f"Enrichment batch complete. Successfully processed {success_count}/{len(ids)} items."
-        logger.info(log_msg)
-        return {"status": "ok", "processed": len(ids), "success": success_count, "log": [log_msg]}
-    except Exception as e:
-        logger.error(f"Enrichment queue failed: {e}", exc_info=True)
-        return {"status": "error", "log": [str(e)]}
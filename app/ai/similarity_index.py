@@ -0,0 +1,203 @@
+"""
+app/ai/similarity_index.py - Exact in-process cosine search over memory-mapped, per-type embedding matrices
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app_state import CONFIG_DIR
+from app.logger import get_logger
+
+logger = get_logger("MixerBee.SimilarityIndex")
+
+ENABLED = os.environ.get("MIXERBEE_NUMPY_SIMILARITY", "true").lower() not in ("0", "false", "no")
+INDEX_DIR = CONFIG_DIR / "similarity_index"
+MANIFEST = INDEX_DIR / "manifest.json"
+PAGE_SIZE = 2000
+REBUILD_MIN_INTERVAL = 60
+
+class _Partition:
+    """Normalized vectors of one media type plus the metadata needed to build results."""
+    def __init__(self, media_type: str, matrix: np.ndarray, ids: List[str], metas: List[Dict]):
+        self.media_type = media_type
+        self.matrix = matrix
+        self.ids = ids
+        self.metas = metas
+
+_lock = threading.Lock()
+_partitions: Dict[str, _Partition] = {}
+_built_generation: Optional[int] = None
+_rebuilding = False
+_last_build = 0.0
+
+def _slug(media_type: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", media_type or "Other")
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def _write_partitions(grouped: Dict[str, Dict[str, list]], generation: int):
+    """Writes each type's matrix and sidecar atomically, then the manifest that points at them."""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    manifest = {"generation": generation, "types": {}}
+    for media_type, group in grouped.items():
+        matrix = _normalize(np.asarray(group["vectors"], dtype=np.float32))
+        base = INDEX_DIR / f"{_slug(media_type)}-{generation}"
+        with open(f"{base}.npy.tmp", "wb") as f:
+            np.save(f, matrix, allow_pickle=False)
+        os.replace(f"{base}.npy.tmp", f"{base}.npy")
+        with open(f"{base}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump({"ids": group["ids"], "metas": group["metas"]}, f)
+        os.replace(f"{base}.json.tmp", f"{base}.json")
+        manifest["types"][media_type] = {"file": base.name, "count": len(group["ids"]), "dim": int(matrix.shape[1])}
+
+    tmp = MANIFEST.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, MANIFEST)
+
+    keep = {entry["file"] for entry in manifest["types"].values()}
+    for path in INDEX_DIR.iterdir():
+        if path.suffix in (".npy", ".json") and path.stem not in keep and path != MANIFEST:
+            path.unlink(missing_ok=True)
+
+def _load_from_disk() -> bool:
+    """Memory-maps the on-disk index, whichever collection generation it was built for."""
+    global _partitions, _built_generation
+    try:
+        with open(MANIFEST, encoding="utf-8") as f:
+            manifest = json.load(f)
+        generation = manifest["generation"]
+        partitions = {}
+        for media_type, entry in manifest["types"].items():
+            base = INDEX_DIR / entry["file"]
+            with open(f"{base}.json", encoding="utf-8") as f:
+                side = json.load(f)
+            partitions[media_type] = _Partition(media_type, np.load(f"{base}.npy", mmap_mode="r"), side["ids"], side["metas"])
+    except (OSError, ValueError, KeyError):
+        return False
+    _partitions, _built_generation = partitions, generation
+    logger.info(f"Loaded similarity index generation {generation} from disk ({sum(len(p.ids) for p in partitions.values())} items).")
+    return True
+
+def build(collection, generation: int):
+    """Reads every embedding from the collection and (re)writes the per-type matrices."""
+    global _last_build
+    _last_build = time.monotonic()
+    grouped: Dict[str, Dict[str, list]] = {}
+    total = collection.count()
+    for offset in range(0, total, PAGE_SIZE):
+        res = collection.get(limit=PAGE_SIZE, offset=offset, include=["embeddings", "metadatas"])
+        embeddings = res.get("embeddings")
+        if embeddings is None:
+            continue
+        for item_id, vector, meta in zip(res.get("ids", []), embeddings, res.get("metadatas") or []):
+            meta = meta or {}
+            group = grouped.setdefault(meta.get("type") or "Other", {"ids": [], "vectors": [], "metas": []})
+            group["ids"].append(item_id)
+            group["vectors"].append(vector)
+            group["metas"].append({
+                "name": meta.get("name", "Unknown"),
+                "year": meta.get("year", "Unknown"),
+                "genres": meta.get("genres", "")
+            })
+
+    _write_partitions(grouped, generation)
+    if not _load_from_disk() or _built_generation != generation:
+        raise RuntimeError("Similarity index was written but could not be loaded.")
+
+def _rebuild_in_background(collection, generation: int):
+    global _rebuilding
+    try:
+        build(collection, generation)
+    except Exception as e:
+        logger.error(f"Similarity index rebuild failed: {e}", exc_info=True)
+    finally:
+        _rebuilding = False
+
+def ensure_current(collection, generation: int) -> bool:
+    """
+    Makes sure an index is available. Only a missing index is built synchronously; a stale one,
+    including one loaded from disk after a restart, keeps serving while a rebuild runs in the
+    background (at most once per REBUILD_MIN_INTERVAL). Returns False when no index can be used.
+    """
+    global _rebuilding
+    if not ENABLED:
+        return False
+    if _built_generation == generation:
+        return True
+    with _lock:
+        if _built_generation is None and not _load_from_disk():
+            try:
+                build(collection, generation)
+            except Exception as e:
+                logger.error(f"Similarity index build failed: {e}", exc_info=True)
+                return False
+        stale = _built_generation != generation
+        if stale and not _rebuilding and time.monotonic() - _last_build >= REBUILD_MIN_INTERVAL:
+            _rebuilding = True
+            threading.Thread(
+                target=_rebuild_in_background, args=(collection, generation),
+                name="similarity-index-rebuild", daemon=True
+            ).start()
+    return True
+
+def search(query: Sequence[float], k: int, media_type: Optional[str] = None, exclude: Sequence[str] = ()) -> List[Dict]:
+    """
+    Exact top-k by cosine similarity: one matrix-vector product per partition plus argpartition.
+    Returns result dicts ordered by ascending cosine distance.
+    """
+    q = np.asarray(query, dtype=np.float32)
+    norm = np.linalg.norm(q)
+    if norm == 0:
+        return []
+    q = q / norm
+
+    partitions = _partitions
+    if media_type and media_type not in partitions:
+        return []
+    targets = [partitions[media_type]] if media_type else list(partitions.values())
+
+    excluded = set(exclude)
+    want = k + len(excluded)
+    candidates = []
+    for part in targets:
+        if not part.ids:
+            continue
+        scores = part.matrix @ q
+        n = min(want, len(scores))
+        top = np.argpartition(-scores, n - 1)[:n] if n < len(scores) else np.arange(len(scores))
+        candidates.extend((float(scores[i]), part, int(i)) for i in top)
+
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    results = []
+    for score, part, i in candidates:
+        item_id = part.ids[i]
+        if item_id in excluded:
+            continue
+        meta = part.metas[i]
+        results.append({
+            "Id": item_id,
+            "Name": meta["name"],
+            "Type": part.media_type,
+            "Year": meta["year"],
+            "Genres": meta["genres"],
+            "Distance": 1.0 - score
+        })
+        if len(results) >= k:
+            break
+    return results
+
+def clear():
+    global _partitions, _built_generation
+    with _lock:
+        _partitions, _built_generation = {}, None
+        MANIFEST.unlink(missing_ok=True)
@@ -0,0 +1,32 @@
+"""
+app/ai/source_stamps.py - Server Etag/DateLastSaved of each indexed item, for change detection
+"""
+
+from typing import Dict, Iterable, Tuple
+
+import database
+
+def get_all() -> Dict[str, str]:
+    """Item id -> stamp recorded when the item was last indexed or checked."""
+    with database.get_db_connection() as conn:
+        rows = conn.execute("SELECT item_id, stamp FROM vector_source_stamps").fetchall()
+    return {row["item_id"]: row["stamp"] for row in rows}
+
+def record(stamps: Iterable[Tuple[str, str]]):
+    """Stores (item_id, stamp) pairs."""
+    rows = list(stamps)
+    if not rows:
+        return
+    with database.get_db_connection() as conn:
+        conn.executemany("INSERT OR REPLACE INTO vector_source_stamps (item_id, stamp) VALUES (?, ?)", rows)
+        conn.commit()
+
+def remove(item_ids: Iterable[str]):
+    with database.get_db_connection() as conn:
+        conn.executemany("DELETE FROM vector_source_stamps WHERE item_id = ?", [(item_id,) for item_id in item_ids])
+        conn.commit()
+
+def clear():
+    with database.get_db_connection() as conn:
+        conn.execute("DELETE FROM vector_source_stamps")
+        conn.commit()
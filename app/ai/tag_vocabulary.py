@@ -0,0 +1,145 @@
+"""
+app/ai/tag_vocabulary.py - Persisted vibe tag vocabulary (frequency / item counts)
+"""
+
+import random
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import database
+from app.logger import get_logger
+
+logger = get_logger("MixerBee.TagVocabulary")
+
+_rebuild_lock = threading.Lock()
+
+BUILT_KEY = "vibe_tags_built"
+
+def split_tags(tag_str: Optional[str]) -> List[str]:
+    """Splits a stored vibe_tags string into normalized, de-duplicated tags."""
+    if not tag_str:
+        return []
+    return list(dict.fromkeys(t.strip().lower() for t in tag_str.split(",") if t.strip()))
+
+def record_tags(old_tag_str: Optional[str], new_tag_str: Optional[str]):
+    """
+    Applies one item's tag change. item_count tracks how many items carry a tag right now;
+    frequency counts every time the tag has been assigned.
+    """
+    old_tags, new_tags = set(split_tags(old_tag_str)), split_tags(new_tag_str)
+    added = [t for t in new_tags if t not in old_tags]
+    removed = [t for t in old_tags if t not in new_tags]
+    if not added and not removed:
+        return
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO vibe_tags (tag, frequency, item_count) VALUES (?, 1, 1)
+            ON CONFLICT(tag) DO UPDATE SET frequency = frequency + 1, item_count = item_count + 1
+            """,
+            [(t,) for t in added]
+        )
+        conn.executemany(
+            "UPDATE vibe_tags SET item_count = MAX(item_count - 1, 0) WHERE tag = ?",
+            [(t,) for t in removed]
+        )
+        conn.commit()
+
+def add_items(tag_strs: Iterable[Optional[str]]):
+    """Counts the tags of items inserted with tags already set (e.g. restored enrichments)."""
+    counts = Counter(t for tag_str in tag_strs for t in split_tags(tag_str))
+    if not counts:
+        return
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO vibe_tags (tag, frequency, item_count) VALUES (?, ?, ?)
+            ON CONFLICT(tag) DO UPDATE SET
+                frequency = frequency + excluded.frequency,
+                item_count = item_count + excluded.item_count
+            """,
+            [(t, n, n) for t, n in counts.items()]
+        )
+        conn.commit()
+
+def remove_items(tag_strs: Iterable[Optional[str]]):
+    """Discounts the tags of items that were deleted from the vector DB."""
+    counts = Counter(t for tag_str in tag_strs for t in split_tags(tag_str))
+    if not counts:
+        return
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            "UPDATE vibe_tags SET item_count = MAX(item_count - ?, 0) WHERE tag = ?",
+            [(n, t) for t, n in counts.items()]
+        )
+        conn.commit()
+
+def clear():
+    with database.get_db_connection() as conn:
+        conn.execute("DELETE FROM vibe_tags")
+        conn.execute("DELETE FROM settings WHERE key = ?", (BUILT_KEY,))
+        conn.commit()
+
+def rebuild(collection) -> int:
+    """Rebuilds the vocabulary from every enriched item in the collection. Returns the tag count."""
+    counts: Counter = Counter()
+    for flag in (True, "True"):
+        res = collection.get(where={"is_enriched": flag}, include=["metadatas"])
+        for meta in res.get("metadatas") or []:
+            counts.update(split_tags((meta or {}).get("vibe_tags")))
+
+    with database.get_db_connection() as conn:
+        conn.execute("DELETE FROM vibe_tags")
+        conn.executemany(
+            "INSERT INTO vibe_tags (tag, frequency, item_count) VALUES (?, ?, ?)",
+            [(t, n, n) for t, n in counts.items()]
+        )
+        conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, '1')", (BUILT_KEY,))
+        conn.commit()
+    logger.info(f"Rebuilt vibe tag vocabulary with {len(counts)} tags.")
+    return len(counts)
+
+def ensure_built(collection, enriched_count: int):
+    """
+    Builds the vocabulary once when enriched items exist but it was never built (e.g. after an
+    upgrade). After that it is kept current incrementally, even when it holds no tags.
+    """
+    if enriched_count <= 0:
+        return
+    with _rebuild_lock:
+        with database.get_db_connection() as conn:
+            built = conn.execute("SELECT 1 FROM settings WHERE key = ?", (BUILT_KEY,)).fetchone()
+        if not built:
+            rebuild(collection)
+
+def sample_tags(limit: int = 60, weighted: bool = False) -> List[str]:
+    """
+    Random sample of tags in use. With weighted=True tags carried by more items are more
+    likely to be picked (weighted sampling without replacement).
+    """
+    with database.get_db_connection() as conn:
+        rows = conn.execute("SELECT tag, item_count FROM vibe_tags WHERE item_count > 0").fetchall()
+    if not rows:
+        return []
+    if not weighted:
+        return [row["tag"] for row in random.sample(rows, min(limit, len(rows)))]
+    keyed = sorted(rows, key=lambda row: random.random() ** (1.0 / row["item_count"]), reverse=True)
+    return [row["tag"] for row in keyed[:limit]]
+
+def suggest(prefix: str, limit: int = 10) -> List[Dict[str, int]]:
+    """Tag autocompletion: tags starting with prefix, most widely used first."""
+    prefix = (prefix or "").strip().lower()
+    if not prefix:
+        return []
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    with database.get_db_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT tag, frequency, item_count FROM vibe_tags
+            WHERE tag LIKE ? ESCAPE '\\' AND item_count > 0
+            ORDER BY item_count DESC, tag LIMIT ?
+            """,
+            (escaped + "%", limit)
+        ).fetchall()
+    return [dict(row) for row in rows]
@@ -2,24 +2,43 @@
 app/ai/vector_store.py - Vector DB init and config with robust similarity search.
 """
 
+import hashlib
 import json
+import queue
 import time
 import threading
-import random
+from collections import OrderedDict
+from datetime import datetime
 from typing import List, Dict, Optional
 import chromadb
 import numpy as np
+from chromadb.utils import embedding_functions
 
 import app.client as client
+import database
+from app import title_index
+from . import embedding_cache, enrichment_queue, library_stats, similarity_index, source_stamps, tag_vocabulary
 from app_state import CONFIG_DIR
 from app.logger import get_logger, refresh_logger_level
 
 logger = get_logger("MixerBee.Vector")
 
 CHROMA_PATH = CONFIG_DIR / "chroma_db"
+
+FETCH_BATCH_SIZE = 100
+PIPELINE_DEPTH = 4
+EMBED_BATCH_MIN = 32
+EMBED_BATCH_MAX = 512
+EMBED_TARGET_SECONDS = 2.0
+INDEX_REPORT_KEY = "vector_index_report"
+GENERATION_KEY = "vector_generation"
+QUERY_EMBEDDING_CACHE_SIZE = 512
+VIBE_RESULT_CACHE_SIZE = 256
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 chroma_client = chromadb.PersistentClient(path=str(CHROMA_PATH))
 
 _active_collection: Optional[chromadb.Collection] = None
+_embedding_function = embedding_functions.DefaultEmbeddingFunction()
 
 def get_media_collection() -> chromadb.Collection:
     """
@@ -29,10 +48,53 @@ def get_media_collection() -> chromadb.Collection:
     if _active_collection is None:
         _active_collection = chroma_client.get_or_create_collection(
             name="mixerbee_media",
-            metadata={"hnsw:space": "cosine"}
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=_embedding_function
         )
     return _active_collection
 
+_generation: Optional[int] = None
+_generation_lock = threading.Lock()
+
+def get_generation() -> int:
+    """Persisted counter that changes whenever the collection's vectors or metadata are written."""
+    global _generation
+    if _generation is None:
+        with _generation_lock:
+            if _generation is None:
+                with database.get_db_connection() as conn:
+                    row = conn.execute("SELECT value FROM settings WHERE key = ?", (GENERATION_KEY,)).fetchone()
+                _generation = int(row["value"]) if row else 0
+    return _generation
+
+def bump_generation():
+    global _generation
+    get_generation()
+    with _generation_lock:
+        _generation += 1
+        value = _generation
+    with database.get_db_connection() as conn:
+        conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (GENERATION_KEY, str(value)))
+        conn.commit()
+
+def embed_documents(documents: List[str]) -> List[List[float]]:
+    """Embeds documents through the content-addressed cache so unchanged text is never re-embedded."""
+    return embedding_cache.embed(EMBEDDING_MODEL, documents, _embedding_function)
+
+def _seed_embedding_cache(col: chromadb.Collection):
+    """Copies the collection's existing vectors into the embedding cache before it is wiped."""
+    total = col.count()
+    seeded = 0
+    for offset in range(0, total, 1000):
+        res = col.get(limit=1000, offset=offset, include=["documents", "embeddings"])
+        embeddings = res.get("embeddings")
+        if embeddings is None:
+            continue
+        pairs = [(doc, emb) for doc, emb in zip(res.get("documents") or [], embeddings) if doc]
+        if pairs:
+            seeded += embedding_cache.put_many(EMBEDDING_MODEL, [p[0] for p in pairs], [p[1] for p in pairs])
+    logger.info(f"RESET: Embedding cache seeded with {seeded} new vectors from {total} items.")
+
 class CollectionProxy:
     """
     A transparent proxy for the ChromaDB collection.
@@ -74,6 +136,11 @@ def reset_media_collection(preserve_enrichments: bool = True):
                         enriched_backups[item_id] = meta['vibe_tags']
                 logger.info(f"RESET: Backed up {len(enriched_backups)} enriched items.")
 
+        try:
+            _seed_embedding_cache(col)
+        except Exception as e:
+            logger.warning(f"RESET: Could not seed embedding cache: {e}")
+
         logger.info("RESET: Deleting 'mixerbee_media' collection...")
         chroma_client.delete_collection(name="mixerbee_media")
     except Exception as e:
@@ -83,6 +150,13 @@ def reset_media_collection(preserve_enrichments: bool = True):
 
     _active_collection = None
     get_media_collection()
+    title_index.set_media([])
+    library_stats.reset()
+    source_stamps.clear()
+    tag_vocabulary.clear()
+    enrichment_queue.clear()
+    similarity_index.clear()
+    bump_generation()
 
     if preserve_enrichments and enriched_backups:
         app_state.ENRICHMENT_BACKUP = enriched_backups
@@ -168,76 +242,273 @@ def migrate_enrichment_fields():
         logger.error(f"Migration failed: {e}", exc_info=True)
 
 def calculate_library_iq() -> dict:
+    """Returns total / enriched counts (overall and by type) from the maintained counters."""
     try:
-        total = media_collection.count()
-        if total == 0: return {"total": 0, "enriched": 0}
-
-        all_data = media_collection.get(limit=total, include=["metadatas"])
-
-        enriched_count = 0
-        if all_data and all_data.get('metadatas'):
-            for meta in all_data['metadatas']:
-                if meta and str(meta.get('is_enriched', 'False')).lower() == "true":
-                    enriched_count += 1
-
-        return {"total": total, "enriched": enriched_count}
+        return library_stats.get_stats(media_collection)
     except Exception as e:
         logger.error(f"Stats calculation failed: {e}")
         return {"total": 0, "enriched": 0}
 
-def get_discovery_tags(limit: int = 60) -> List[str]:
+def get_discovery_tags(limit: int = 60, weighted: bool = False) -> List[str]:
     """
-    Extracts and aggregates unique vibe_tags from all enriched media.
-    Checks both boolean and string variants to be safe.
+    Samples vibe tags from the persisted tag vocabulary, optionally weighted by how many
+    items carry each tag. The vocabulary is built from the collection once if it is missing.
     """
     try:
-        enriched_data = media_collection.get(
-            where={"is_enriched": True},
-            include=["metadatas"],
-            limit=2000
-        )
-        
-        all_metadatas = enriched_data.get('metadatas', [])
-        
-        if not all_metadatas:
-            enriched_data = media_collection.get(
-                where={"is_enriched": "True"},
-                include=["metadatas"],
-                limit=2000
-            )
-            all_metadatas = enriched_data.get('metadatas', [])
-
-        if not all_metadatas:
-            return []
-            
-        all_tags = set()
-        for meta in all_metadatas:
-            tag_str = meta.get('vibe_tags', '')
-            if tag_str:
-                parts = [t.strip().lower() for t in tag_str.split(',') if t.strip()]
-                all_tags.update(parts)
-        
-        tag_list = list(all_tags)
-        random.shuffle(tag_list)
-        return tag_list[:limit]
+        tag_vocabulary.ensure_built(media_collection, calculate_library_iq().get("enriched", 0))
+        return tag_vocabulary.sample_tags(limit=limit, weighted=weighted)
     except Exception as e:
         logger.error(f"Failed to aggregate discovery tags: {e}")
         return []
 
+def load_title_index():
+    """(Re)builds the typeahead title index from the names stored in the vector DB."""
+    try:
+        res = media_collection.get(include=["metadatas"])
+        rows = [
+            {"Id": item_id, "Name": meta.get("name", "Unknown"), "Year": meta.get("year", ""), "Type": meta.get("type", "")}
+            for item_id, meta in zip(res.get("ids", []), res.get("metadatas", []))
+            if meta
+        ]
+        title_index.set_media(rows)
+    except Exception as e:
+        logger.error(f"Failed to load title index from vector DB: {e}")
+
+def _refresh_title_collections(user_id: str, hdr: dict):
+    from app.items import get_collections
+    try:
+        title_index.set_collections(get_collections(user_id, hdr))
+    except Exception as e:
+        logger.warning(f"Failed to refresh collections for the title index: {e}")
+
+def _content_fingerprint(meta: Dict) -> str:
+    """Hash of the server-side fields that feed the embedded document."""
+    parts = [str(meta.get(field, "")) for field in ("name", "type", "year", "genres", "overview")]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+def _server_stamp(item: Dict) -> str:
+    return item.get("Etag") or item.get("DateLastSaved") or ""
+
+def vector_document(meta: Dict) -> str:
+    """The text embedded for an item. Indexing and enrichment must both use it so the embedding cache hits."""
+    return (f"Title: {meta.get('name', '')}. Year: {meta.get('year', 'Unknown Year')}. Format: {meta.get('type')}. "
+            f"Genres: {meta.get('genres', '')}. Style: {meta.get('vibe_tags', '')}. Summary: {meta.get('overview') or 'No summary available.'}")
+
+def _build_vector_row(item: Dict, backup_tags: Dict[str, str]):
+    """Returns (document, metadata) for one Emby item, restoring backed-up AI tags."""
+    title = item.get("Name", "")
+    overview = item.get("Overview", "").strip() or "No summary available."
+    genres = ", ".join(item.get("Genres", []))
+
+    year = item.get("ProductionYear")
+    if not year and item.get("PremiereDate"):
+        try:
+            year = item.get("PremiereDate")[:4]
+        except: pass
+    if not year and item.get("DateCreated"):
+        try:
+            year = item.get("DateCreated")[:4]
+        except: pass
+
+    year_str = str(year) if year else "Unknown Year"
+
+    is_enriched = False
+    vibe_tags = ""
+    if item["Id"] in backup_tags:
+        vibe_tags = backup_tags[item["Id"]]
+        is_enriched = True
+        logger.info(f"MIGRATION: Restoring AI tags for '{title}'")
+
+    meta = {
+        "name": title,
+        "type": item.get("Type"),
+        "year": year_str,
+        "genres": genres,
+        "overview": overview,
+        "is_enriched": is_enriched,
+        "vibe_tags": vibe_tags
+    }
+    meta["fingerprint"] = _content_fingerprint(meta)
+    return vector_document(meta), meta
+
+def _fetch_index_batches(ids_to_fetch: List[str], user_id: str, hdr: dict, backup_tags: Dict[str, str],
+                         out: "queue.Queue", stop: threading.Event, timings: Dict[str, float]):
+    """Producer: fetches item metadata from Emby and queues ready-to-embed rows."""
+    try:
+        for i in range(0, len(ids_to_fetch), FETCH_BATCH_SIZE):
+            if stop.is_set():
+                break
+            fetch_start = time.monotonic()
+            params = {
+                "Ids": ",".join(ids_to_fetch[i:i + FETCH_BATCH_SIZE]),
+                "UserId": user_id,
+                "Fields": "Overview,Genres,ProductionYear,PremiereDate,DateCreated,DateLastSaved,Etag"
+            }
+            r = client.SESSION.get(f"{client.EMBY_URL}/Users/{user_id}/Items", params=params, headers=hdr, timeout=30)
+            r.raise_for_status()
+            rows = [(item["Id"], *_build_vector_row(item, backup_tags), _server_stamp(item)) for item in r.json().get("Items", [])]
+            timings["fetch"] += time.monotonic() - fetch_start
+            if rows:
+                out.put(rows)
+        out.put(None)
+    except Exception as e:
+        out.put(e)
+
+def _upsert_rows(rows: List[tuple], title_rows: List[Dict]):
+    upsert_ids = [row[0] for row in rows]
+    documents = [row[1] for row in rows]
+    metadatas = [row[2] for row in rows]
+
+    media_collection.upsert(documents=documents, metadatas=metadatas, ids=upsert_ids, embeddings=embed_documents(documents))
+    bump_generation()
+    source_stamps.record((row[0], row[3]) for row in rows)
+    library_stats.record_added(metadatas)
+    tag_vocabulary.add_items(meta["vibe_tags"] for meta in metadatas)
+    enrichment_queue.enqueue(
+        (item_id for item_id, meta in zip(upsert_ids, metadatas) if not meta["is_enriched"]),
+        priority=enrichment_queue.RECENT_PRIORITY
+    )
+    title_rows.extend(
+        {"Id": item_id, "Name": meta["name"], "Year": meta["year"], "Type": meta["type"]}
+        for item_id, meta in zip(upsert_ids, metadatas)
+    )
+
+def _update_changed_rows(rows: List[tuple], title_rows: List[Dict]) -> int:
+    """
+    Applies re-fetched server metadata to existing items, keeping their AI enrichment.
+    Only items whose content fingerprint changed get a new document and embedding; the
+    rest just record the new server stamp. Returns how many items were re-embedded.
+    """
+    ids = [row[0] for row in rows]
+    found = media_collection.get(ids=ids, include=["metadatas"])
+    current = dict(zip(found.get("ids", []), found.get("metadatas", [])))
+
+    changed = {"ids": [], "documents": [], "metadatas": []}
+    backfilled = {"ids": [], "metadatas": []}
+    stamps = []
+    for item_id, _, fresh, stamp in rows:
+        old = current.get(item_id)
+        if old is None:
+            continue
+        stamps.append((item_id, stamp))
+        old_fingerprint = old.get("fingerprint") or _content_fingerprint(old)
+        if old_fingerprint == fresh["fingerprint"]:
+            if not old.get("fingerprint"):
+                backfilled["ids"].append(item_id)
+                backfilled["metadatas"].append({**old, "fingerprint": old_fingerprint})
+            continue
+        meta = {**old, **fresh, "is_enriched": old.get("is_enriched", False), "vibe_tags": old.get("vibe_tags", "")}
+        changed["ids"].append(item_id)
+        changed["documents"].append(vector_document(meta))
+        changed["metadatas"].append(meta)
+        logger.info(f"Metadata changed for '{meta['name']}'. Re-embedding.")
+
+    if backfilled["ids"]:
+        media_collection.update(ids=backfilled["ids"], metadatas=backfilled["metadatas"])
+    if changed["ids"]:
+        media_collection.update(
+            ids=changed["ids"], metadatas=changed["metadatas"], documents=changed["documents"],
+            embeddings=embed_documents(changed["documents"])
+        )
+        bump_generation()
+        title_rows.extend(
+            {"Id": item_id, "Name": meta["name"], "Year": meta["year"], "Type": meta["type"]}
+            for item_id, meta in zip(changed["ids"], changed["metadatas"])
+        )
+    source_stamps.record(stamps)
+    return len(changed["ids"])
+
+def _run_index_pipeline(ids: List[str], user_id: str, hdr: dict, backup_tags: Dict[str, str],
+                        handle_rows, timings: Dict[str, float]) -> int:
+    """
+    Streams item metadata for ids from a fetch thread into handle_rows, resizing each
+    handle_rows call to take about EMBED_TARGET_SECONDS. Returns the number of rows handled.
+    """
+    batches: "queue.Queue" = queue.Queue(maxsize=PIPELINE_DEPTH)
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_fetch_index_batches,
+        args=(ids, user_id, hdr, backup_tags, batches, stop, timings),
+        name="vector-index-fetch",
+        daemon=True
+    )
+    producer.start()
+
+    embed_batch_size = EMBED_BATCH_MIN
+    buffer: List[tuple] = []
+    processed = 0
+    fetch_done = False
+    try:
+        while not fetch_done or buffer:
+            if not fetch_done and len(buffer) < embed_batch_size:
+                batch = batches.get()
+                if isinstance(batch, Exception):
+                    raise batch
+                if batch is None:
+                    fetch_done = True
+                else:
+                    buffer.extend(batch)
+                continue
+
+            rows, buffer = buffer[:embed_batch_size], buffer[embed_batch_size:]
+            embed_start = time.monotonic()
+            handle_rows(rows)
+            elapsed = time.monotonic() - embed_start
+            timings["embed"] += elapsed
+            embed_batch_size = _next_embed_batch_size(embed_batch_size, len(rows), elapsed)
+            processed += len(rows)
+            logger.info(f"Processed {processed} / {len(ids)} items (next embed batch: {embed_batch_size}).")
+    finally:
+        stop.set()
+        while producer.is_alive():
+            try:
+                batches.get(timeout=0.1)
+            except queue.Empty:
+                pass
+    return processed
+
+def _next_embed_batch_size(current: int, rows: int, elapsed: float) -> int:
+    """Scales the upsert size so each embedding call takes roughly EMBED_TARGET_SECONDS."""
+    if elapsed <= 0 or rows <= 0:
+        return current
+    target = int(rows * EMBED_TARGET_SECONDS / elapsed)
+    return max(EMBED_BATCH_MIN, min(EMBED_BATCH_MAX, target))
+
+def _save_index_report(report: Dict):
+    try:
+        with database.get_db_connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (INDEX_REPORT_KEY, json.dumps(report)))
+            conn.commit()
+    except Exception as e:
+        logger.warning(f"Could not save indexing report: {e}")
+
+def get_index_report() -> Optional[Dict]:
+    """Returns the report of the last library indexing run (status, counts, duration, items/s)."""
+    with database.get_db_connection() as conn:
+        row = conn.execute("SELECT value FROM settings WHERE key = ?", (INDEX_REPORT_KEY,)).fetchone()
+    return json.loads(row["value"]) if row else None
+
 def index_library_for_vibes(user_id: str, hdr: dict):
-    """Fetches metadata from Emby and embeds locally. Restores AI tags from backup if available."""
+    """
+    Fetches metadata from Emby and embeds locally. Restores AI tags from backup if available.
+    Emby fetches run in a producer thread so the next batches download while the current
+    one is embedded; the embedding batch size adapts to how long each upsert takes.
+    Items whose Etag/DateLastSaved moved are re-fetched and re-embedded if their content changed.
+    """
     import app_state
     refresh_logger_level()
     migrate_enrichment_fields()
     logger.info("Vector DB Checking for Library Updates")
 
     backup_tags = getattr(app_state, 'ENRICHMENT_BACKUP', {})
+    started = time.monotonic()
+    report = {"status": "running", "started_at": datetime.now().isoformat(), "added": 0, "removed": 0, "updated": 0}
 
     try:
-        existing_data = media_collection.get(include=[])
-        existing_ids = set(existing_data['ids']) if existing_data and existing_data['ids'] else set()
+        existing_ids = set(media_collection.get(include=[]).get("ids") or [])
+        existing_stamps = source_stamps.get_all()
 
-        emby_ids = set()
+        server_stamps: Dict[str, str] = {}
         start_index = 0
         limit = 15000
 
@@ -248,115 +519,100 @@ def index_library_for_vibes(user_id: str, hdr: dict):
                 "UserId": user_id,
                 "StartIndex": start_index,
                 "Limit": limit,
-                "Fields": ""
+                "Fields": "DateLastSaved,Etag"
             }
             r = client.SESSION.get(f"{client.EMBY_URL}/Users/{user_id}/Items", params=params, headers=hdr, timeout=30)
             r.raise_for_status()
             items = r.json().get("Items", [])
             if not items: break
 
-            emby_ids.update([item["Id"] for item in items])
+            server_stamps.update({item["Id"]: _server_stamp(item) for item in items})
             if len(items) < limit: break
             start_index += limit
 
+        emby_ids = set(server_stamps)
         ids_to_remove = list(existing_ids - emby_ids)
         ids_to_add = list(emby_ids - existing_ids)
+        ids_to_check = [
+            item_id for item_id in existing_ids & emby_ids
+            if server_stamps[item_id] and server_stamps[item_id] != existing_stamps.get(item_id, "")
+        ]
+
+        _refresh_title_collections(user_id, hdr)
+        if not title_index.is_media_loaded():
+            load_title_index()
 
         if ids_to_remove:
             logger.info(f"Removing {len(ids_to_remove)} deleted items from Vector DB.")
             for i in range(0, len(ids_to_remove), 500):
+                removed = media_collection.get(ids=ids_to_remove[i:i+500], include=["metadatas"])
                 media_collection.delete(ids=ids_to_remove[i:i+500])
-
-        if not ids_to_add:
+                library_stats.record_removed(removed.get("metadatas") or [])
+                tag_vocabulary.remove_items((meta or {}).get("vibe_tags") for meta in removed.get("metadatas") or [])
+            enrichment_queue.remove(ids_to_remove)
+            source_stamps.remove(ids_to_remove)
+            title_index.update_media(removed_ids=ids_to_remove)
+            bump_generation()
+            report["removed"] = len(ids_to_remove)
+
+        if not ids_to_add and not ids_to_check:
             logger.info("Vector DB is up to date. No new items to index.")
+            if ids_to_remove:
+                report.update(status="ok", seconds=round(time.monotonic() - started, 2), finished_at=datetime.now().isoformat())
+                _save_index_report(report)
             return
 
-        logger.info(f"Found {len(ids_to_add)} items to index. Checking for AI tag restoration...")
+        _save_index_report(report)
 
-        batch_size = 100
-        for i in range(0, len(ids_to_add), batch_size):
-            batch_ids = ids_to_add[i:i+batch_size]
-            params = {
-                "Ids": ",".join(batch_ids),
-                "UserId": user_id,
-                "Fields": "Overview,Genres,ProductionYear,PremiereDate,DateCreated"
-            }
-            r = client.SESSION.get(f"{client.EMBY_URL}/Users/{user_id}/Items", params=params, headers=hdr, timeout=30)
-            r.raise_for_status()
+        title_rows = []
+        timings = {"fetch": 0.0, "embed": 0.0}
+        processed = 0
+        if ids_to_add:
+            logger.info(f"Found {len(ids_to_add)} items to index. Checking for AI tag restoration...")
+            processed = _run_index_pipeline(
+                ids_to_add, user_id, hdr, backup_tags, lambda rows: _upsert_rows(rows, title_rows), timings
+            )
 
-            new_items = r.json().get("Items", [])
-            if not new_items: continue
-
-            documents = []
-            metadatas = []
-            upsert_ids = []
-
-            for item in new_items:
-                item_id = item["Id"]
-                title = item.get("Name", "")
-                overview = item.get("Overview", "").strip() or "No summary available."
-                genres = ", ".join(item.get("Genres", []))
-
-                year = item.get("ProductionYear")
-                if not year and item.get("PremiereDate"):
-                    try:
-                        year = item.get("PremiereDate")[:4]
-                    except: pass
-                if not year and item.get("DateCreated"):
-                    try:
-                        year = item.get("DateCreated")[:4]
-                    except: pass
-
-                year_str = str(year) if year else "Unknown Year"
-
-                is_enriched = False
-                vibe_tags = ""
-                if item_id in backup_tags:
-                    vibe_tags = backup_tags[item_id]
-                    is_enriched = True
-                    logger.info(f"MIGRATION: Restoring AI tags for '{title}'")
-
-                text_to_embed = f"Title: {title}. Year: {year_str}. Format: {item.get('Type')}. Genres: {genres}. Style: {vibe_tags}. Summary: {overview}"
-
-                documents.append(text_to_embed)
-                metadatas.append({
-                    "name": title,
-                    "type": item.get("Type"),
-                    "year": year_str,
-                    "genres": genres,
-                    "overview": overview,
-                    "is_enriched": is_enriched,
-                    "vibe_tags": vibe_tags
-                })
-                upsert_ids.append(item_id)
-
-
-            if upsert_ids:
-                media_collection.upsert(
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=upsert_ids
-                )
-            logger.info(f"Processed {min(i+batch_size, len(ids_to_add))} / {len(ids_to_add)} items.")
+        if ids_to_check:
+            logger.info(f"{len(ids_to_check)} items were modified on the server. Checking for content changes...")
+            updated = 0
+            def handle_changed(rows):
+                nonlocal updated
+                updated += _update_changed_rows(rows, title_rows)
+            _run_index_pipeline(ids_to_check, user_id, hdr, {}, handle_changed, timings)
+            report["updated"] = updated
+            logger.info(f"Re-embedded {updated} of {len(ids_to_check)} modified items.")
+
+        title_index.update_media(upserts=title_rows)
 
         if hasattr(app_state, 'ENRICHMENT_BACKUP') and app_state.ENRICHMENT_BACKUP:
             app_state.ENRICHMENT_BACKUP = {}
             logger.info("MIGRATION: Enrichment restoration buffer cleared.")
 
-        logger.info("Vector Update Complete")
+        seconds = max(time.monotonic() - started, 1e-6)
+        report.update(
+            status="ok",
+            added=processed,
+            seconds=round(seconds, 2),
+            items_per_second=round(processed / seconds, 1),
+            fetch_seconds=round(timings["fetch"], 2),
+            embed_seconds=round(timings["embed"], 2),
+            embedding_cache=embedding_cache.get_stats(),
+            finished_at=datetime.now().isoformat()
+        )
+        _save_index_report(report)
+        logger.info(f"Vector Update Complete: {processed} items in {report['seconds']}s ({report['items_per_second']} items/s).")
 
     except Exception as e:
         logger.error(f"Failed during library sync: {e}", exc_info=True)
+        report.update(status="error", error=str(e), seconds=round(time.monotonic() - started, 2), finished_at=datetime.now().isoformat())
+        _save_index_report(report)
 
-def search_by_vibe(query: str = None, media_type: str = None, limit: int = None, threshold: float = None, **kwargs) -> List[Dict[str, str]]:
-    """
-    Searches the library for media matching a specific vibe, mood, theme, or description.
-    Includes a 'Radius Lock' to filter out mathematically irrelevant results.
-    """
-    refresh_logger_level()
+def _prepare_vibe_search(query: str = None, media_type: str = None, limit: int = None, threshold: float = None, **kwargs) -> Optional[Dict]:
+    """Resolves one vibe search request into its query text, type filter, limit and radius."""
     if not query:
         query = kwargs.get("vibe") or kwargs.get("concept") or kwargs.get("description")
-    if not query: return []
+    if not query: return None
 
     from .orchestrator import ai_tweaks_context
     active_tweaks = ai_tweaks_context.get()
@@ -375,14 +631,12 @@ def search_by_vibe(query: str = None, media_type: str = None, limit: int = None,
         current_threshold += 0.10
         logger.info(f"Broad term detected, relaxing radius to {current_threshold:.2f}.")
 
+    mt_normalized = ""
     try:
-        where_clause = {}
-        mt_normalized = ""
         if media_type:
             mt_normalized = media_type.strip().capitalize()
             if mt_normalized in ["Tv", "Show"]:
                 mt_normalized = "Series"
-            where_clause["type"] = mt_normalized
 
         if limit is not None:
             final_limit = int(limit)
@@ -397,48 +651,185 @@ def search_by_vibe(query: str = None, media_type: str = None, limit: int = None,
         final_limit = 15
 
     logger.info(f"Vibe Search Request: '{query}' | Threshold: {current_threshold:.2f} | Limit: {final_limit}")
+    return {"query": query, "type": mt_normalized, "limit": final_limit, "threshold": current_threshold}
+
+def _collect_vibe_matches(spec: Dict, ids: List[str], metadatas: List[Dict], distances: Optional[List[float]]) -> List[Dict[str, str]]:
+    matched_items = []
+    for i in range(min(len(ids), spec["limit"])):
+        name = metadatas[i]["name"]
+        year = metadatas[i].get("year", "Unknown")
+        item_id = ids[i]
+        distance = distances[i] if distances else 0.0
+
+        if distance > spec["threshold"]:
+            logger.info(f"    [SKIPPED] {name} ({year}) | Cosine Distance: {distance:.4f} (Outside Radius)")
+            continue
+
+        matched_items.append({
+            "Id": item_id,
+            "Name": name,
+            "Type": metadatas[i]["type"],
+            "Year": year,
+            "Genres": metadatas[i].get("genres", ""),
+            "Distance": distance
+        })
+
+        logger.info(f"    [KEEP] {name} ({year}) [ID: {item_id}] | Cosine Distance: {distance:.4f}")
+    return matched_items
+
+class _LRU:
+    """Small thread-safe LRU with hit/miss counters."""
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.items: "OrderedDict" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self.items), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+_query_embeddings = _LRU(QUERY_EMBEDDING_CACHE_SIZE)
+_vibe_results = _LRU(VIBE_RESULT_CACHE_SIZE)
+_vibe_results_generation: Optional[int] = None
+
+def _embed_queries(texts: List[str]) -> List[np.ndarray]:
+    """Embeds query strings, reusing vectors of recently seen queries."""
+    vectors = [_query_embeddings.get((EMBEDDING_MODEL, text)) for text in texts]
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        for i, vector in zip(missing, _embedding_function([texts[i] for i in missing])):
+            vectors[i] = np.asarray(vector, dtype=np.float32)
+            _query_embeddings.put((EMBEDDING_MODEL, texts[i]), vectors[i])
+    return vectors
+
+def _vibe_cache_key(spec: Dict) -> tuple:
+    return (spec["query"].strip().lower(), spec["type"], spec["limit"], round(spec["threshold"], 4))
+
+def get_search_cache_stats() -> Dict[str, Dict[str, int]]:
+    return {"query_embeddings": _query_embeddings.stats(), "vibe_results": _vibe_results.stats()}
+
+def search_by_vibes(searches: List[Dict]) -> List[List[Dict[str, str]]]:
+    """
+    Runs several vibe searches at once (e.g. every search_by_vibe tool call of one LLM turn).
+    All query texts are embedded in a single model call and each media type filter gets one
+    multi-query Chroma search. Returns one result list per request, in request order.
+    Query vectors and result sets are cached; result sets are dropped when the collection
+    generation changes.
+    """
+    refresh_logger_level()
+    specs = [_prepare_vibe_search(**(search or {})) for search in searches]
+    grouped: List[List[Dict[str, str]]] = [[] for _ in specs]
+
+    global _vibe_results_generation
+    generation = get_generation()
+    if _vibe_results_generation != generation:
+        _vibe_results.clear()
+        _vibe_results_generation = generation
+
+    active = []
+    for i, spec in enumerate(specs):
+        if not spec:
+            continue
+        cached = _vibe_results.get(_vibe_cache_key(spec))
+        if cached is not None:
+            logger.info(f"    [CACHED] '{spec['query']}' -> {len(cached)} matches")
+            grouped[i] = [dict(item) for item in cached]
+        else:
+            active.append(i)
+    if not active:
+        return grouped
 
     try:
-        results = media_collection.query(
-            query_texts=[query],
-            n_results=final_limit,
-            where=where_clause if where_clause else None,
-            include=["metadatas", "distances"]
-        )
-
-        if not results or not results.get('ids') or len(results['ids'][0]) == 0:
-            return []
-
-        matched_items = []
-        for i in range(len(results['ids'][0])):
-            name = results['metadatas'][0][i]["name"]
-            year = results['metadatas'][0][i].get("year", "Unknown")
-            item_id = results['ids'][0][i]
-            distance = results['distances'][0][i] if results['distances'] else 0.0
-
-            if distance > current_threshold:
-                logger.info(f"    [SKIPPED] {name} ({year}) | Cosine Distance: {distance:.4f} (Outside Radius)")
+        vectors = _embed_queries([specs[i]["query"] for i in active])
+        by_type: Dict[str, List[int]] = {}
+        for n, i in enumerate(active):
+            by_type.setdefault(specs[i]["type"], []).append(n)
+
+        for media_type, members in by_type.items():
+            results = media_collection.query(
+                query_embeddings=[np.asarray(vectors[n]).tolist() for n in members],
+                n_results=max(specs[active[n]]["limit"] for n in members),
+                where={"type": media_type} if media_type else None,
+                include=["metadatas", "distances"]
+            )
+            if not results or not results.get('ids'):
                 continue
+            for row, n in enumerate(members):
+                grouped[active[n]] = _collect_vibe_matches(
+                    specs[active[n]],
+                    results['ids'][row],
+                    results['metadatas'][row],
+                    results['distances'][row] if results.get('distances') else None
+                )
+                _vibe_results.put(_vibe_cache_key(specs[active[n]]), [dict(item) for item in grouped[active[n]]])
 
-            matched_items.append({
-                "Id": item_id,
-                "Name": name,
-                "Type": results['metadatas'][0][i]["type"],
-                "Year": year,
-                "Genres": results['metadatas'][0][i].get("genres", ""),
-                "Distance": distance
-            })
-
-            logger.info(f"    [KEEP] {name} ({year}) [ID: {item_id}] | Cosine Distance: {distance:.4f}")
-
-        return matched_items
+        try:
+            enrichment_queue.bump_priority(item["Id"] for matches in grouped for item in matches)
+        except Exception as e:
+            logger.debug(f"Could not bump enrichment priority: {e}")
     except Exception as e:
         logger.error(f"Vibe search failed: {e}")
+    return grouped
+
+def search_by_vibe(query: str = None, media_type: str = None, limit: int = None, threshold: float = None, **kwargs) -> List[Dict[str, str]]:
+    """
+    Searches the library for media matching a specific vibe, mood, theme, or description.
+    Includes a 'Radius Lock' to filter out mathematically irrelevant results.
+    """
+    return search_by_vibes([{"query": query, "media_type": media_type, "limit": limit, "threshold": threshold, **kwargs}])[0]
+
+def _query_composite_candidates(composite_vector, n_results: int, target_type: Optional[str], seed_ids: set) -> List[Dict]:
+    """Chroma HNSW fallback used when the in-process similarity index is disabled or unavailable."""
+    results = media_collection.query(
+        query_embeddings=[composite_vector.tolist()],
+        n_results=n_results,
+        where={"type": target_type} if target_type else None,
+        include=["metadatas", "distances"]
+    )
+    if not results or not results.get('ids') or len(results['ids'][0]) == 0:
         return []
 
+    items = []
+    for i in range(len(results['ids'][0])):
+        cid = results['ids'][0][i]
+        if cid in seed_ids:
+            continue
+        meta = results['metadatas'][0][i]
+        items.append({
+            "Id": cid,
+            "Name": meta["name"],
+            "Type": meta["type"],
+            "Year": meta.get("year", "Unknown"),
+            "Genres": meta.get("genres", ""),
+            "Distance": results['distances'][0][i] if results['distances'] else 0.0
+        })
+    return items
+
 def search_by_composite_similarity(positive_ids: list, negative_ids: list, limit: int = 10, threshold: float = 0.65, mixed_echo: bool = False):
     """
     Finds items similar to a weighted average of multiple seed items, minus negative seeds.
+    Uses exact top-k from the in-process similarity index, falling back to a Chroma query.
     """
     refresh_logger_level()
     all_ids = positive_ids + negative_ids
@@ -466,42 +857,18 @@ def search_by_composite_similarity(positive_ids: list, negative_ids: list, limit
             composite_vector = composite_vector - (neg_vec * 0.4)
 
         target_type = id_to_type.get(positive_ids[0]) if not mixed_echo else None
+        seed_id_set = set(all_ids)
 
-        results = media_collection.query(
-            query_embeddings=[composite_vector.tolist()],
-            n_results=limit + len(all_ids) + 5,
-            where={"type": target_type} if target_type else None,
-            include=["metadatas", "distances"]
-        )
+        if similarity_index.ensure_current(media_collection, get_generation()):
+            candidates = similarity_index.search(composite_vector, limit + 5, media_type=target_type, exclude=seed_id_set)
+        else:
+            candidates = _query_composite_candidates(composite_vector, limit + len(all_ids) + 5, target_type, seed_id_set)
 
-        if not results or not results.get('ids') or len(results['ids'][0]) == 0:
+        if not candidates:
             return []
 
-        matched_items = []
-        seed_id_set = set(all_ids)
-
         def build_matches(current_threshold):
-            items = []
-            for i in range(len(results['ids'][0])):
-                cid = results['ids'][0][i]
-                if cid in seed_id_set:
-                    continue
-
-                name = results['metadatas'][0][i]["name"]
-                distance = results['distances'][0][i] if results['distances'] else 0.0
-
-                if distance > current_threshold:
-                    continue
-
-                items.append({
-                    "Id": cid,
-                    "Name": name,
-                    "Type": results['metadatas'][0][i]["type"],
-                    "Year": results['metadatas'][0][i].get("year", "Unknown"),
-                    "Genres": results['metadatas'][0][i].get("genres", ""),
-                    "Distance": distance
-                })
-            return items
+            return [item for item in candidates if item["Distance"] <= current_threshold]
 
         matched_items = build_matches(threshold)
 
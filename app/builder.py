@@ -2,69 +2,89 @@
 app/builder.py - Logic for building mixed playlists from blocks with randomized Echo sampling.
 """
 
-import logging
 import random
-from typing import Dict, List, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional
 from itertools import zip_longest
 
+import app_state
 from . import client
+from app.logger import get_logger
 from . import items as items_api
 from .items import create_playlist, add_items_to_playlist_by_ids
 from .movies import find_movies
 from .music import find_songs, get_songs_by_album, get_songs_by_artist
 from .tv import episodes, get_first_unwatched_episode, get_random_unwatched_episode, get_first_available_episode, series_id
 
+logger = get_logger("MixerBee.Builder")
 
-def _process_tv_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, str], log_messages: List[str], block_index: int) -> List[Dict[str, Any]]:
-    items = []
-    try:
-        should_interleave = block.get("interleave", True)
-        groups: List[List[Dict[str, Any]]] = []
-        count = int(block.get("count", 1))
 
-        for raw_show in block.get("shows", []):
-            try:
-                if not isinstance(raw_show, dict):
-                    continue
+def _resolve_show_episodes(raw_show: Dict[str, Any], user_id: str, hdr: Dict[str, str], count: int, unwatched_default: bool) -> List[Dict[str, Any]]:
+    """Resolves a single show entry of a TV or Curated block into its list of episodes."""
+    show_name = raw_show.get("name")
+    sid = items_api.sanitize_id(raw_show.get("id"))
 
-                show_name = raw_show.get("name")
-                sid = items_api.sanitize_id(raw_show.get("id"))
+    if not sid and show_name:
+        sid = series_id(show_name, hdr)
 
-                if not sid and show_name:
-                    sid = series_id(show_name, hdr)
+    if not sid:
+        return []
 
-                if not sid:
-                    continue
+    s = raw_show.get("season")
+    e = raw_show.get("episode")
+    is_unwatched = raw_show.get("unwatched", unwatched_default)
 
-                s = raw_show.get("season")
-                e = raw_show.get("episode")
-                is_unwatched = raw_show.get("unwatched", False)
+    if s is not None: s = int(s)
+    if e is not None: e = int(e)
 
-                if s is not None: s = int(s)
-                if e is not None: e = int(e)
+    if s is None or e is None:
+        if is_unwatched:
+            ep_info = get_first_unwatched_episode(sid, user_id, hdr)
+            if ep_info:
+                s = ep_info.get("ParentIndexNumber")
+                e = ep_info.get("IndexNumber")
 
-                if s is None or e is None:
-                    if is_unwatched:
-                        ep_info = get_first_unwatched_episode(sid, user_id, hdr)
-                        if ep_info:
-                            s = ep_info.get("ParentIndexNumber")
-                            e = ep_info.get("IndexNumber")
+    if s is None or e is None:
+        first_ep = get_first_available_episode(sid, user_id, hdr)
+        if first_ep:
+            s = first_ep.get("ParentIndexNumber")
+            e = first_ep.get("IndexNumber")
+        else:
+            s, e = 1, 1
+
+    return episodes(sid, s, e, count, hdr, user_id=user_id, only_unwatched=is_unwatched)
+
+def _run_ordered(func: Callable[..., Any], args_list: List[tuple], max_workers: int) -> List[Any]:
+    """
+    Runs func over every argument tuple on a bounded thread pool.
+    Results are returned in the same order as args_list, so callers see the same output as a serial loop.
+    """
+    if max_workers <= 1 or len(args_list) <= 1:
+        return [func(*args) for args in args_list]
 
-                if s is None or e is None:
-                    first_ep = get_first_available_episode(sid, user_id, hdr)
-                    if first_ep:
-                        s = first_ep.get("ParentIndexNumber")
-                        e = first_ep.get("IndexNumber")
-                    else:
-                        s, e = 1, 1
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(args_list)), thread_name_prefix="MixerBee-Build") as pool:
+        return list(pool.map(lambda args: func(*args), args_list))
 
-                eps = episodes(sid, s, e, count, hdr, user_id=user_id, only_unwatched=is_unwatched)
+def _process_tv_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, str], log_messages: List[str], block_index: int) -> List[Dict[str, Any]]:
+    items = []
+    try:
+        should_interleave = block.get("interleave", True)
+        count = int(block.get("count", 1))
 
-                if eps:
-                    groups.append(eps)
+        def resolve(raw_show: Any) -> List[Dict[str, Any]]:
+            try:
+                if not isinstance(raw_show, dict):
+                    return []
+                return _resolve_show_episodes(raw_show, user_id, hdr, count, unwatched_default=False)
             except Exception as inner_e:
-                logging.warning(f"Skipping series in block {block_index} due to error: {inner_e}")
-                continue
+                logger.warning(f"Skipping series in block {block_index} due to error: {inner_e}")
+                return []
+
+        shows = block.get("shows", [])
+        groups: List[List[Dict[str, Any]]] = [
+            eps for eps in _run_ordered(resolve, [(raw_show,) for raw_show in shows], app_state.BUILDER_SHOW_WORKERS) if eps
+        ]
 
         if groups:
             if should_interleave:
@@ -75,9 +95,10 @@ def _process_tv_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, str],
                     items.extend(episode_group)
 
     except Exception as e:
-        logging.error(f"Error processing TV block {block_index}: {e}", exc_info=True)
+        logger.error(f"Error processing TV block {block_index}: {e}", exc_info=True)
 
     return items
+
 def _process_movie_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, str], log_messages: List[str], block_index: int) -> List[Dict[str, Any]]:
     items = []
     try:
@@ -106,7 +127,7 @@ def _process_movie_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, str
             items = find_movies(user_id=user_id, filters=filters, hdr=hdr)
 
     except Exception as e:
-        logging.error(f"Error processing Movie block {block_index}: {e}", exc_info=True)
+        logger.error(f"Error processing Movie block {block_index}: {e}", exc_info=True)
     return items
 
 def _process_mirror_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, str], log_messages: List[str], block_index: int) -> List[Dict[str, Any]]:
@@ -213,7 +234,7 @@ def _process_mirror_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, st
             items = master_items + items
 
     except Exception as e:
-        logging.error(f"Error processing Echo block {block_index}: {e}", exc_info=True)
+        logger.error(f"Error processing Echo block {block_index}: {e}", exc_info=True)
     return items
 
 def _process_music_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, str], log_messages: List[str], block_index: int) -> List[Dict[str, Any]]:
@@ -243,7 +264,7 @@ def _process_music_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, str
             items.extend(songs)
 
     except Exception as e:
-        logging.error(f"Error processing music block {block_index}: {e}", exc_info=True)
+        logger.error(f"Error processing music block {block_index}: {e}", exc_info=True)
 
     return items
 
@@ -266,36 +287,8 @@ def _process_curated_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, s
         tv_list = []
         shows = block.get("shows", [])
         if shows:
-            groups = []
-            for raw_show in shows:
-                show_name = raw_show.get("name")
-                sid = items_api.sanitize_id(raw_show.get("id"))
-                if not sid and show_name:
-                    sid = series_id(show_name, hdr)
-                if not sid: continue
-
-                s = raw_show.get("season")
-                e = raw_show.get("episode")
-                is_unwatched = raw_show.get("unwatched", True)
-                count = int(raw_show.get("count", 1))
-
-                if s is not None: s = int(s)
-                if e is not None: e = int(e)
-
-                if s is None or e is None:
-                    if is_unwatched:
-                        ep_info = get_first_unwatched_episode(sid, user_id, hdr)
-                        if ep_info:
-                            s, e = ep_info.get("ParentIndexNumber"), ep_info.get("IndexNumber")
-                    if s is None or e is None:
-                        first_ep = get_first_available_episode(sid, user_id, hdr)
-                        if first_ep:
-                            s, e = first_ep.get("ParentIndexNumber"), first_ep.get("IndexNumber")
-                        else:
-                            s, e = 1, 1
-
-                eps = episodes(sid, s, e, count, hdr, user_id=user_id, only_unwatched=is_unwatched)
-                if eps: groups.append(eps)
+            show_args = [(raw_show, user_id, hdr, int(raw_show.get("count", 1)), True) for raw_show in shows]
+            groups = [eps for eps in _run_ordered(_resolve_show_episodes, show_args, app_state.BUILDER_SHOW_WORKERS) if eps]
 
             if block.get("tv_interleave", False):
                 for bundle in zip_longest(*groups):
@@ -318,24 +311,58 @@ def _process_curated_block(block: Dict[str, Any], user_id: str, hdr: Dict[str, s
             items = movies_list + tv_list
 
     except Exception as e:
-        logging.error(f"Error processing Curated block {block_index}: {e}", exc_info=True)
+        logger.error(f"Error processing Curated block {block_index}: {e}", exc_info=True)
     return items
 
-def generate_items_from_blocks(user_id: str, blocks: List[Dict[str, Any]], hdr: Dict[str, str], log_messages: List[str]) -> List[Dict[str, Any]]:
+def _get_block_processor(block: Dict[str, Any]) -> Optional[Callable[..., List[Dict[str, Any]]]]:
+    block_type = block.get("type")
+    if block_type == "tv" or (block_type == "vibe" and block.get("vibe_type") == "tv"):
+        return _process_tv_block
+    if block_type == "movie" or (block_type == "vibe" and block.get("vibe_type") == "movie"):
+        return _process_movie_block
+    if block_type == "music":
+        return _process_music_block
+    if block_type == "mirror" or block_type == "echo":
+        return _process_mirror_block
+    if block_type == "curated":
+        return _process_curated_block
+    return None
+
+def generate_items_from_blocks(user_id: str, blocks: List[Dict[str, Any]], hdr: Dict[str, str], log_messages: List[str],
+                               max_workers: Optional[int] = None, timings: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Builds the master item list for a set of blocks.
+    Blocks are executed concurrently on a bounded pool (max_workers, defaulting to BUILDER_MAX_WORKERS)
+    and reassembled in their original order. If a timings list is given, it receives one entry per block.
+    """
+    build_start = time.perf_counter()
+
+    def run_block(block_index: int, block: Dict[str, Any]) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        start = time.perf_counter()
+        processor = _get_block_processor(block)
+        block_items = processor(block, user_id, hdr, log_messages, block_index) if processor else []
+        return block_items, {
+            "block": block_index,
+            "type": block.get("type"),
+            "items": len(block_items),
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+
+    workers = max_workers if max_workers is not None else app_state.BUILDER_MAX_WORKERS
+    results = _run_ordered(run_block, list(enumerate(blocks, 1)), workers)
+
     master_items_list: List[Dict[str, Any]] = []
+    block_timings = []
+    for block_items, block_timing in results:
+        master_items_list.extend(block_items)
+        block_timings.append(block_timing)
+
+    total_seconds = time.perf_counter() - build_start
+    breakdown = ", ".join(f"#{t['block']} {t['type']}: {t['seconds']:.2f}s ({t['items']} items)" for t in block_timings)
+    logger.info(f"Built {len(master_items_list)} items from {len(blocks)} blocks in {total_seconds:.2f}s. {breakdown}")
 
-    for i, block in enumerate(blocks, 1):
-        block_type = block.get("type")
-        if block_type == "tv" or (block_type == "vibe" and block.get("vibe_type") == "tv"):
-            master_items_list.extend(_process_tv_block(block, user_id, hdr, log_messages, i))
-        elif block_type == "movie" or (block_type == "vibe" and block.get("vibe_type") == "movie"):
-            master_items_list.extend(_process_movie_block(block, user_id, hdr, log_messages, i))
-        elif block_type == "music":
-            master_items_list.extend(_process_music_block(block, user_id, hdr, log_messages, i))
-        elif block_type == "mirror" or block_type == "echo":
-            master_items_list.extend(_process_mirror_block(block, user_id, hdr, log_messages, i))
-        elif block_type == "curated":
-            master_items_list.extend(_process_curated_block(block, user_id, hdr, log_messages, i))
+    if timings is not None:
+        timings.extend(block_timings)
 
     return master_items_list
 
@@ -2,11 +2,25 @@
 app/cache.py - Manages a persistent, background-refreshed cache for library data
 """
 
+import contextvars
+import gzip
+import hashlib
+import json
+import os
+import tempfile
 import threading
-from typing import Dict, Any, List
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from app.logger import get_logger
 
-from . import tv, movies, studios, client,  music, users
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from . import tv, movies, studios, client,  music, users, movie_index
 
 logger = get_logger("MixerBee.Cache")
 
@@ -14,57 +28,325 @@ _cache_key = ["data"]
 CACHE: Dict[str, Any] = {_cache_key[0]: {}}
 
 _refresh_lock = threading.Lock()
+_publish_lock = threading.Lock()
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PATH = client.CONFIG_DIR / "library_cache.json"
+CACHE_SECTIONS = ("seriesData", "movieGenreData", "libraryData", "artistData", "musicGenreData", "studioData")
+
+DELTA_OVERLAP_SECONDS = 300
+# Count signatures miss renames and swaps, so every section is refetched in full at least this often.
+FULL_REFRESH_MAX_AGE = timedelta(hours=int(os.environ.get("MIXERBEE_CACHE_FULL_REFRESH_HOURS", 24)))
+
+_snapshot_saved_at = None
+_live_sections = set()
+_delta_state: Dict[str, Any] = {}
+_last_refresh: Dict[str, Any] = {}
+
+_generation = 0
+_section_generations: Dict[str, int] = {}
+_encoded: Dict[Tuple[Optional[str], str], Tuple[int, bytes, str]] = {}
+_encode_lock = threading.Lock()
 
 def get_library_data() -> Dict[str, Any]:
     """Safely retrieves the current data from the cache."""
     return CACHE.get(_cache_key[0], {})
 
-def _fetch_all_data(auth_details: Dict[str, str]) -> Dict[str, Any]:
+def get_cache_status() -> Dict[str, Any]:
+    """Reports whether the cache is still (partly) served from the on-disk snapshot."""
+    with _publish_lock:
+        stale_sections = [name for name in CACHE_SECTIONS if name not in _live_sections]
+    return {
+        "stale": _snapshot_saved_at is not None and bool(stale_sections),
+        "snapshot_saved_at": _snapshot_saved_at,
+        "stale_sections": stale_sections if _snapshot_saved_at is not None else [],
+        "last_refresh": dict(_last_refresh),
+    }
+
+def _publish_section(name: str, value: Any):
+    """
+    Copy-on-write publish of one section, so readers always see a complete dict. The section's
+    generation (and so its encoded bodies) only changes when the value actually changed.
+    """
+    global _generation
+    with _publish_lock:
+        current = CACHE.get(_cache_key[0], {})
+        _live_sections.add(name)
+        if name in current and (current[name] is value or current[name] == value):
+            return
+        updated = dict(current)
+        updated[name] = value
+        CACHE[_cache_key[0]] = updated
+        _generation += 1
+        _section_generations[name] = _generation
+
+def _pick_encoding(accept_encoding: str) -> str:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(token.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+def get_encoded_payload(section: Optional[str], accept_encoding: str = "") -> Optional[Tuple[bytes, str, str]]:
+    """
+    Returns (body, encoding, etag) for the whole cache or a single section, or None if there is
+    nothing cached yet. Serialization and compression happen once per section generation and
+    encoding; the strong ETag is derived from the JSON content and the encoding.
+    """
+    with _publish_lock:
+        generation = _generation if section is None else _section_generations.get(section, 0)
+        data = CACHE.get(_cache_key[0], {})
+    payload = data if section is None else data.get(section)
+    if not data or payload is None:
+        return None
+
+    encoding = _pick_encoding(accept_encoding)
+    with _encode_lock:
+        entry = _encoded.get((section, "identity"))
+        if entry is None or entry[0] != generation:
+            raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            entry = _encoded[(section, "identity")] = (generation, raw, hashlib.sha1(raw).hexdigest()[:20])
+        _, raw, digest = entry
+
+        entry = _encoded.get((section, encoding))
+        if entry is None or entry[0] != generation:
+            if encoding == "br":
+                body = brotli.compress(raw, quality=5)
+            else:
+                body = gzip.compress(raw, compresslevel=6)
+            entry = _encoded[(section, encoding)] = (generation, body, digest)
+        _, body, digest = entry
+
+    return body, encoding, f'"{digest}-{encoding}"'
+
+def load_snapshot(server_id: str, user_id: str) -> bool:
+    """
+    Seeds the cache from the on-disk snapshot if it was written by this snapshot version
+    for the same server and user. The data is served as stale until a refresh replaces it.
+    """
+    global _snapshot_saved_at, _delta_state, _generation
+    try:
+        with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable library cache snapshot: {e}")
+        return False
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        logger.info("Library cache snapshot version changed. Ignoring it.")
+        return False
+    if snapshot.get("server_id") != server_id or snapshot.get("user_id") != user_id:
+        logger.info("Library cache snapshot belongs to a different server or user. Ignoring it.")
+        return False
+
+    data = {k: v for k, v in snapshot.get("data", {}).items() if k in CACHE_SECTIONS}
+    with _publish_lock:
+        if CACHE.get(_cache_key[0]):
+            return False
+        CACHE[_cache_key[0]] = data
+        _generation += 1
+        _section_generations.update({name: _generation for name in data})
+    _snapshot_saved_at = snapshot.get("saved_at")
+    _delta_state = snapshot.get("delta_state") or {}
+    logger.info(f"Loaded library cache snapshot from {_snapshot_saved_at} ({len(data)} sections).")
+    return True
+
+def save_snapshot(server_id: str, user_id: str):
+    """Atomically writes the current cache to disk (temp file + rename)."""
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "server_id": server_id,
+        "user_id": user_id,
+        "data": get_library_data(),
+        "delta_state": _delta_state,
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=SNAPSHOT_PATH.parent, prefix=".library_cache.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, SNAPSHOT_PATH)
+    except OSError as e:
+        logger.warning(f"Failed to write library cache snapshot: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+def _section_fetchers(login_uid: str, hdr: Dict[str, str]) -> Dict[str, Callable[[], Any]]:
+    return {
+        "seriesData": lambda: tv.get_all_series(login_uid, hdr),
+        "movieGenreData": lambda: movies.get_movie_genres(login_uid, hdr),
+        "libraryData": lambda: movies.get_movie_libraries(login_uid, hdr),
+        "artistData": lambda: music.get_music_artists(hdr),
+        "musicGenreData": lambda: music.get_music_genres(login_uid, hdr),
+        "studioData": lambda: studios.aggregate_all_studios(login_uid, hdr),
+    }
+
+def _count_query(name: str, login_uid: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """Endpoint and params whose TotalRecordCount acts as the drift signature for a section."""
+    user_items = f"{client.EMBY_URL}/Users/{login_uid}/Items"
+    return {
+        "seriesData": (user_items, {"IncludeItemTypes": "Series", "Recursive": "true"}),
+        "movieGenreData": (f"{client.EMBY_URL}/Genres", {"IncludeItemTypes": "Movie", "UserId": login_uid}),
+        "artistData": (f"{client.EMBY_URL}/Artists", {"Recursive": "true", "UserId": login_uid, "AlbumArtistOnly": "true"}),
+        "musicGenreData": (user_items, {"IncludeItemTypes": "MusicAlbum", "Recursive": "true"}),
+        "studioData": (f"{client.EMBY_URL}/Studios", {"UserId": login_uid}),
+    }.get(name)
+
+def _count_items(url: str, params: Dict[str, str], hdr: Dict[str, str]) -> int:
+    r = client.SESSION.get(url, params={**params, "Limit": 0}, headers=hdr, timeout=15)
+    r.raise_for_status()
+    return r.json().get("TotalRecordCount", 0)
+
+def _patch_series(login_uid: str, hdr: Dict[str, str], cached: List[Dict], since: str, total: int) -> Optional[List[Dict]]:
+    """Applies series saved since the last sync to the cached list. Returns None if counts drift."""
+    url, params = _count_query("seriesData", login_uid)
+    r = client.SESSION.get(url, params={**params, "MinDateLastSaved": since}, headers=hdr, timeout=15)
+    r.raise_for_status()
+    patched = {s["id"]: s for s in cached}
+    for it in r.json().get("Items", []):
+        patched[it["Id"]] = {"id": it["Id"], "name": it["Name"]}
+    if len(patched) != total:
+        return None
+    return list(patched.values())
+
+def _refresh_section(name: str, fetch: Callable[[], Any], login_uid: str, hdr: Dict[str, str],
+                     cached: Dict[str, Any], signatures: Dict[str, int], since: Optional[str]) -> Tuple[Any, Optional[int], str]:
+    """
+    Refreshes one section, returning (value, signature, how). With a previous sync time,
+    count-checked sections are kept when their count is unchanged, series are patched with
+    items saved since then, and anything that drifted is fetched in full.
+    """
+    query = _count_query(name, login_uid)
+    signature = _count_items(*query, hdr) if query else None
+
+    if since and name in cached and signature is not None:
+        if name == "seriesData":
+            patched = _patch_series(login_uid, hdr, cached[name], since, signature)
+            if patched is not None:
+                return patched, signature, "patched"
+        elif signature == signatures.get(name):
+            if name != "musicGenreData":
+                return cached[name], signature, "kept"
+            url, params = query
+            if _count_items(url, {**params, "MinDateLastSaved": since}, hdr) == 0:
+                return cached[name], signature, "kept"
+
+    return fetch(), signature, "full"
+
+def _fetch_all_data(auth_details: Dict[str, str], full: bool = False) -> Dict[str, Any]:
     """
     The core data fetching logic. This function contacts the media server
     to get all the necessary data for the application's UI.
+    Sections are fetched concurrently and each one is published to the cache as soon
+    as it arrives. A section that fails keeps its previously cached value.
+    Unless full is set, sections are refreshed incrementally (see _refresh_section).
     """
-    try:
-        token = auth_details.get("token")
-        login_uid = auth_details.get("login_uid")
-
-        if not all([token, login_uid]):
-            logger.warning("Cannot refresh cache, missing auth details.")
-            return {}
-
-        hdr = client.auth_headers(token, login_uid)
-
-        logger.info("Starting background refresh of all library data...")
-        
-        data = {
-            "seriesData": tv.get_all_series(login_uid, hdr),
-            "movieGenreData": movies.get_movie_genres(login_uid, hdr),
-            "libraryData": movies.get_movie_libraries(login_uid, hdr),
-            "artistData": music.get_music_artists(hdr),
-            "musicGenreData": music.get_music_genres(login_uid, hdr),
-            "studioData": studios.aggregate_all_studios(login_uid, hdr),
-        }
-        logger.info("Background refresh completed successfully.")
-        return data
+    global _delta_state
+
+    token = auth_details.get("token")
+    login_uid = auth_details.get("login_uid")
 
-    except Exception as e:
-        logger.error(f"An error occurred during background refresh: {e}", exc_info=True)
+    if not all([token, login_uid]):
+        logger.warning("Cannot refresh cache, missing auth details.")
         return {}
 
-def refresh_cache(auth_details: Dict[str, str] = None):
+    hdr = client.auth_headers(token, login_uid)
+    fetchers = _section_fetchers(login_uid, hdr)
+    cached = get_library_data()
+    signatures = dict(_delta_state.get("signatures", {}))
+    now = datetime.now(timezone.utc)
+    last_full = _delta_state.get("last_full")
+    if last_full and now - datetime.strptime(last_full, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc) >= FULL_REFRESH_MAX_AGE:
+        full = True
+    since = None if full or not last_full or _delta_state.get("user_id") != login_uid else _delta_state.get("last_sync")
+    sync_started = now - timedelta(seconds=DELTA_OVERLAP_SECONDS)
+
+    logger.info(f"Starting background {'incremental' if since else 'full'} refresh of all library data...")
+    started = time.monotonic()
+    data = {}
+    modes = {}
+
+    with ThreadPoolExecutor(max_workers=len(fetchers), thread_name_prefix="cache-warmup") as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, _refresh_section,
+                        name, fetch, login_uid, hdr, cached, signatures, since): name
+            for name, fetch in fetchers.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                data[name], signature, modes[name] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to refresh cache section '{name}', keeping previous data: {e}", exc_info=True)
+                continue
+            if signature is not None:
+                signatures[name] = signature
+            _publish_section(name, data[name])
+            logger.info(f"Cache section '{name}' ready ({modes[name]}) after {time.monotonic() - started:.2f}s.")
+
+    failed = [name for name in fetchers if name not in data]
+    # Only move the sync points forward when every section caught up to them.
+    _delta_state = {
+        "user_id": login_uid,
+        "last_sync": _delta_state.get("last_sync") if failed else sync_started.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "last_full": last_full if failed or since else now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "signatures": signatures,
+    }
+    _last_refresh.clear()
+    _last_refresh.update({"mode": "incremental" if since else "full", "sections": modes, "failed": failed})
+
+    if failed:
+        logger.warning(f"Background refresh finished with failed sections: {', '.join(failed)}")
+    else:
+        logger.info(f"Background refresh completed successfully in {time.monotonic() - started:.2f}s.")
+    return data
+
+def refresh_cache(auth_details: Dict[str, str] = None, full: bool = False):
     """
     Public function to trigger a cache refresh. It's thread-safe.
+    Refreshes are incremental unless full is set, no previous sync state exists or the last
+    full refresh is older than FULL_REFRESH_MAX_AGE.
     """
+    import app_state
+
     if not auth_details:
-        from app_state import token, login_uid
-        auth_details = {"token": token, "login_uid": login_uid}
+        auth_details = {"token": app_state.token, "login_uid": app_state.login_uid}
 
     if _refresh_lock.acquire(blocking=False):
         try:
-            new_data = _fetch_all_data(auth_details)
+            started = time.monotonic()
+            with client.meter_transfer() as transfer:
+                new_data = _fetch_all_data(auth_details, full=full)
+            _last_refresh.update({
+                "bytes": transfer["bytes"],
+                "requests": transfer["requests"],
+                "seconds": round(time.monotonic() - started, 2),
+            })
+            logger.info(f"Cache refresh transferred {transfer['bytes']} bytes in {transfer['requests']} requests.")
             if new_data:
-                CACHE[_cache_key[0]] = new_data
+                save_snapshot(app_state.SERVER_ID, auth_details["login_uid"])
+                movie_index.sync_movie_index(
+                    auth_details["login_uid"],
+                    client.auth_headers(auth_details["token"], auth_details["login_uid"]),
+                    get_library_data().get("libraryData", [])
+                )
         finally:
             _refresh_lock.release()
     else:
-        logger.info("Refresh is already in progress. Skipping.")
\ No newline at end of file
+        logger.info("Refresh is already in progress. Skipping.")
+
+def start_background_refresh(auth_details: Dict[str, str] = None) -> threading.Thread:
+    """Runs refresh_cache on a daemon thread so callers (e.g. startup) don't wait on it."""
+    thread = threading.Thread(target=refresh_cache, args=(auth_details,), name="cache-refresh", daemon=True)
+    thread.start()
+    return thread
@@ -6,9 +6,16 @@ import os
 import sys
 import json
 import atexit
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Tuple, Dict, Optional
+from typing import Any, Iterable, Iterator, List, Tuple, Dict, Optional
+from urllib.parse import urlparse
 
+import httpx
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -39,14 +46,218 @@ CLIENT_VERSION = "2026.05.3"
 DEVICE_ID = "MixerBeePy"
 DEVICE_NAME = "MixerBee"
 
+HTTP_MAX_IN_FLIGHT = max(1, int(os.environ.get("MIXERBEE_HTTP_MAX_INFLIGHT", 8)))
+HTTP_POOL_SIZE = max(HTTP_MAX_IN_FLIGHT, int(os.environ.get("MIXERBEE_HTTP_POOL_SIZE", 16)))
+
+class LimitedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that caps concurrent in-flight requests per host with a semaphore, so the
+    scheduler, webhooks and indexer together can't overload a small media server.
+    The pool is sized to at least the in-flight cap, so connections are never discarded.
+    """
+
+    def __init__(self, max_in_flight: int, **kwargs):
+        self.max_in_flight = max_in_flight
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_stats: Dict[str, Dict[str, Any]] = {}
+        self._stats_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def _acquire(self, host: str):
+        with self._stats_lock:
+            limiter = self._host_limits.setdefault(host, threading.BoundedSemaphore(self.max_in_flight))
+            stats = self._host_stats.setdefault(host, {
+                "requests": 0, "in_flight": 0, "peak_in_flight": 0, "waited": 0, "wait_seconds": 0.0
+            })
+
+        started = time.monotonic()
+        if not limiter.acquire(blocking=False):
+            limiter.acquire()
+            with self._stats_lock:
+                stats["waited"] += 1
+                stats["wait_seconds"] += time.monotonic() - started
+
+        with self._stats_lock:
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+            stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        return limiter, stats
+
+    def send(self, request, **kwargs):
+        limiter, stats = self._acquire(urlparse(request.url).netloc)
+        try:
+            response = super().send(request, **kwargs)
+            if not kwargs.get("stream"):
+                # Read the body while holding the slot so the connection is back in the pool first.
+                response.content
+            return response
+        finally:
+            with self._stats_lock:
+                stats["in_flight"] -= 1
+            limiter.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns limiter counters and urllib3 pool utilisation per host."""
+        with self._stats_lock:
+            hosts = {host: dict(stats) for host, stats in self._host_stats.items()}
+        for stats in hosts.values():
+            stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.host}:{pool.port}" if pool.port else pool.host
+            entry = hosts.setdefault(host, {})
+            # urllib3 pre-fills the queue with None placeholders; only real entries are idle sockets.
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0
+            entry.update({
+                "pool_maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+                "idle_connections": idle,
+                "connections_opened": pool.num_connections,
+                "pool_requests": pool.num_requests,
+            })
+
+        return {
+            "pool_size": HTTP_POOL_SIZE,
+            "max_in_flight": self.max_in_flight,
+            "hosts": hosts,
+        }
+
 SESSION = requests.Session()
 _retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504))
-_adapter = HTTPAdapter(max_retries=_retry)
+_adapter = LimitedHTTPAdapter(
+    max_in_flight=HTTP_MAX_IN_FLIGHT,
+    pool_connections=4,
+    pool_maxsize=HTTP_POOL_SIZE,
+    max_retries=_retry
+)
 SESSION.mount("http://", _adapter)
 SESSION.mount("https://", _adapter)
 
+_transfer_meter: ContextVar[Optional[Dict[str, int]]] = ContextVar("mixerbee_transfer_meter", default=None)
+_transfer_meter_lock = threading.Lock()
+
+def _meter_response(response, *args, **kwargs):
+    """Response hook that adds each response's size to the active transfer meter, if any."""
+    meter = _transfer_meter.get()
+    if meter is None:
+        return response
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit():
+        size = int(length)
+    else:
+        size = 0 if kwargs.get("stream") else len(response.content)
+    with _transfer_meter_lock:
+        meter["requests"] += 1
+        meter["bytes"] += size
+    return response
+
+SESSION.hooks["response"].append(_meter_response)
+
+@contextmanager
+def meter_transfer() -> Iterator[Dict[str, int]]:
+    """
+    Counts requests and response bytes made through SESSION in this context.
+    Worker threads must be started with contextvars.copy_context().run to be included.
+    """
+    meter = {"requests": 0, "bytes": 0}
+    reset_token = _transfer_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _transfer_meter.reset(reset_token)
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Returns connection pool and in-flight limiter statistics for SESSION."""
+    return _adapter.get_stats()
+
 atexit.register(SESSION.close)
 
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns the shared async client, creating it on first use inside the running event loop.
+    Connections are kept alive and pooled; HTTP/2 is negotiated when the h2 package is installed.
+    Only the typeahead collection fetch (items.aget_collections) uses it; the tv/movies/music
+    fetchers stay synchronous because the builder already runs them on its worker pool.
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        # httpx ignores client-level limits/http2 when a transport is given, so set them on the transport.
+        _async_client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                retries=3,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=HTTP_MAX_IN_FLIGHT, max_keepalive_connections=HTTP_MAX_IN_FLIGHT),
+            ),
+            timeout=30,
+        )
+        logger.info(f"Created async media server client (HTTP/2: {HTTP2_AVAILABLE}).")
+    return _async_client
+
+async def close_async_client():
+    """Closes the shared async client. Called on application shutdown."""
+    global _async_client
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
+
+async def async_get_json(url: str, params: Optional[Dict[str, Any]], hdr: Dict[str, str],
+                         timeout: int = 30) -> Dict[str, Any]:
+    """Async GET against the media server, returning the decoded JSON body."""
+    r = await get_async_client().get(url, params=params, headers=hdr, timeout=timeout)
+    r.raise_for_status()
+    return r.json()
+
+DEFAULT_PAGE_SIZE = 500
+
+def paginate_items(url: str, params: Dict[str, Any], hdr: Dict[str, str],
+                   page_size: int = DEFAULT_PAGE_SIZE, timeout: int = 30) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily pages through an items endpoint (e.g. /Users/{id}/Items) with StartIndex/Limit.
+    The next page is only requested once the consumer has used the previous one, so callers
+    that stop early never download the rest of the library.
+    The server re-draws SortBy=Random for every page, so pages of a random order overlap and
+    miss items; callers must only use Random when a single page holds the whole answer.
+    """
+    start_index = 0
+
+    while True:
+        page_params = {**params, "StartIndex": start_index, "Limit": page_size}
+        r = SESSION.get(url, params=page_params, headers=hdr, timeout=timeout)
+        r.raise_for_status()
+        body = r.json()
+        page = body.get("Items", [])
+
+        yield from page
+
+        start_index += len(page)
+        total = body.get("TotalRecordCount")
+        if len(page) < page_size or (total is not None and start_index >= total):
+            break
+
+def reservoir_sample(items: Iterable[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    """Uniform random sample of k items from a stream of unknown length, in random order."""
+    sample: List[Dict[str, Any]] = []
+    for n, item in enumerate(items):
+        if n < k:
+            sample.append(item)
+        else:
+            j = random.randint(0, n)
+            if j < k:
+                sample[j] = item
+    random.shuffle(sample)
+    return sample
+
 def test_connection(hdr: Dict[str, str]) -> Tuple[bool, int]:
     """
     Makes a lightweight, authenticated call to the server to check if the token is valid.
@@ -421,38 +421,101 @@ def create_recently_added_playlist(user_id: str, playlist_name: str, count: int,
         logger.error("Error in create_recently_added_playlist", exc_info=True)
         return {"status": "error", "log": log}
 
+def _is_series_unstarted(series_id: str, user_id: str, hdr: Dict[str, str]) -> bool:
+    """Per-series fallback: compares unplayed and total episode counts with two lightweight requests."""
+    series_stats_resp = client.SESSION.get(
+        f"{client.EMBY_URL}/Shows/{series_id}/Episodes",
+        params={"UserId": user_id, "IsPlayed": "false", "Limit": 1},
+        headers=hdr, timeout=10
+    )
+    series_stats_resp.raise_for_status()
+    unplayed_count = series_stats_resp.json().get("TotalRecordCount", 0)
+    series_total_resp = client.SESSION.get(
+        f"{client.EMBY_URL}/Shows/{series_id}/Episodes",
+        params={"UserId": user_id, "Limit": 1},
+        headers=hdr, timeout=10
+    )
+    series_total_resp.raise_for_status()
+    total_count = series_total_resp.json().get("TotalRecordCount", 0)
+    return unplayed_count == total_count and total_count > 0
+
+def _find_unstarted_pilots(user_id: str, hdr: Dict[str, str]) -> tuple[List[Dict], Dict[str, int]]:
+    """
+    Finds the S01E01 of every series the user has not started.
+    Uses one bulk Series query (UserData play state) and one bulk S1E1 Episode query,
+    only falling back to per-series requests when the bulk data is ambiguous.
+    Returns the pilots and a count of the bulk and per-series calls made.
+    """
+    calls = {"bulk": 0, "per_series": 0}
+
+    all_series_resp = client.SESSION.get(
+        f"{client.EMBY_URL}/Users/{user_id}/Items",
+        params={"IncludeItemTypes": "Series", "Recursive": "true", "Fields": "Id,Name,UserData"},
+        headers=hdr,
+        timeout=20
+    )
+    calls["bulk"] += 1
+    all_series_resp.raise_for_status()
+    all_series = all_series_resp.json().get("Items", [])
+
+    unstarted_ids = []
+    ambiguous_ids = []
+    for series in all_series:
+        user_data = series.get("UserData") or {}
+        if user_data.get("Played") or (user_data.get("PlayedPercentage") or 0) > 0:
+            continue
+        unplayed_count = user_data.get("UnplayedItemCount")
+        if unplayed_count is None:
+            ambiguous_ids.append(series["Id"])
+        elif unplayed_count > 0:
+            unstarted_ids.append(series["Id"])
+
+    for series_id in ambiguous_ids:
+        calls["per_series"] += 2
+        if _is_series_unstarted(series_id, user_id, hdr):
+            unstarted_ids.append(series_id)
+
+    if not unstarted_ids:
+        return [], calls
+
+    pilots_resp = client.SESSION.get(
+        f"{client.EMBY_URL}/Users/{user_id}/Items",
+        params={
+            "IncludeItemTypes": "Episode",
+            "Recursive": "true",
+            "ParentIndexNumber": 1,
+            "IndexNumber": 1,
+            "Fields": "Name,SeriesId,ParentIndexNumber,IndexNumber"
+        },
+        headers=hdr,
+        timeout=30
+    )
+    calls["bulk"] += 1
+    pilots_resp.raise_for_status()
+
+    pilots_by_series = {}
+    for ep in pilots_resp.json().get("Items", []):
+        if ep.get("ParentIndexNumber") == 1 and ep.get("IndexNumber") == 1 and ep.get("SeriesId"):
+            pilots_by_series.setdefault(ep["SeriesId"], ep)
+
+    unwatched_pilots = []
+    for series_id in unstarted_ids:
+        pilot_ep = pilots_by_series.get(series_id)
+        if not pilot_ep:
+            calls["per_series"] += 1
+            pilot_ep = get_specific_episode(series_id, 1, 1, hdr)
+        if pilot_ep:
+            unwatched_pilots.append(pilot_ep)
+
+    return unwatched_pilots, calls
+
 def create_pilot_sampler_playlist(user_id: str, playlist_name: str, count: int, hdr: Dict[str, str], log: List[str]):
     """Creates a playlist of unwatched pilot episodes."""
     try:
-        all_series_resp = client.SESSION.get(
-            f"{client.EMBY_URL}/Users/{user_id}/Items",
-            params={"IncludeItemTypes": "Series", "Recursive": "true", "Fields": "Id,Name"},
-            headers=hdr,
-            timeout=20
-        )
-        all_series_resp.raise_for_status()
-        all_series = all_series_resp.json().get("Items", [])
-        unwatched_pilots = []
-        for series in all_series:
-            series_id = series["Id"]
-            series_stats_resp = client.SESSION.get(
-                f"{client.EMBY_URL}/Shows/{series_id}/Episodes",
-                params={"UserId": user_id, "IsPlayed": "false", "Limit": 1},
-                headers=hdr, timeout=10
-            )
-            series_stats_resp.raise_for_status()
-            unplayed_count = series_stats_resp.json().get("TotalRecordCount", 0)
-            series_total_resp = client.SESSION.get(
-                f"{client.EMBY_URL}/Shows/{series_id}/Episodes",
-                params={"UserId": user_id, "Limit": 1},
-                headers=hdr, timeout=10
-            )
-            series_total_resp.raise_for_status()
-            total_count = series_total_resp.json().get("TotalRecordCount", 0)
-            if unplayed_count == total_count and total_count > 0:
-                pilot_ep = get_specific_episode(series_id, 1, 1, hdr)
-                if pilot_ep:
-                    unwatched_pilots.append(pilot_ep)
+        unwatched_pilots, calls = _find_unstarted_pilots(user_id, hdr)
+        msg = f"Pilot detection used {calls['bulk'] + calls['per_series']} API calls ({calls['bulk']} bulk, {calls['per_series']} per-series)."
+        logger.info(msg)
+        log.append(msg)
         if not unwatched_pilots:
             log.append("No unstarted shows found. Playlist not created.")
             return {"status": "ok", "log": log}
@@ -647,6 +710,16 @@ def get_collections(user_id: str, hdr: Dict[str, str]) -> List[Dict]:
     r.raise_for_status()
     return r.json().get("Items", [])
 
+async def aget_collections(user_id: str, hdr: Dict[str, str]) -> List[Dict]:
+    """Async variant of get_collections."""
+    params = {
+        "IncludeItemTypes": "BoxSet,Collection",
+        "Recursive": "true",
+        "Fields": "Id,Name"
+    }
+    body = await client.async_get_json(f"{client.EMBY_URL}/Users/{user_id}/Items", params, hdr, timeout=10)
+    return body.get("Items", [])
+
 def delete_collection(name: str, user_id: str, hdr: Dict[str, str], log: List[str]):
     """Deletes a collection by its name, checking for both Emby and Jellyfin types."""
     _delete_item_by_name(name, "BoxSet,Collection", user_id, hdr, log)
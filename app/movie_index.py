@@ -0,0 +1,312 @@
+"""
+app/movie_index.py - Incrementally synced local mirror of movie metadata for fast filtering
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+import database
+from . import client
+from app.logger import get_logger
+
+logger = get_logger("MixerBee.MovieIndex")
+
+DETAIL_FIELDS = "Genres,PremiereDate,DateCreated,RunTimeTicks,Studios,People,SortName,ProductionYear,DateLastSaved"
+LOCAL_SORTS = {
+    "Random": "RANDOM()",
+    "PremiereDate": "m.premiere_date, m.sort_name",
+    "DateCreated": "m.date_created DESC",
+    "SortName": "m.sort_name",
+}
+
+_sync_lock = threading.Lock()
+
+def _list_library_movies(user_id: str, library_id: str, hdr: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Lists every movie in a library with only the fields needed to detect changes."""
+    items = []
+    start_index = 0
+    limit = 5000
+    while True:
+        params = {
+            "IncludeItemTypes": "Movie",
+            "Recursive": "true",
+            "ParentId": library_id,
+            "Fields": "DateLastSaved",
+            "EnableUserData": "true",
+            "StartIndex": start_index,
+            "Limit": limit
+        }
+        r = client.SESSION.get(f"{client.EMBY_URL}/Users/{user_id}/Items", params=params, headers=hdr, timeout=30)
+        r.raise_for_status()
+        page = r.json().get("Items", [])
+        items.extend(page)
+        if len(page) < limit:
+            break
+        start_index += limit
+    return items
+
+def _fetch_movie_details(user_id: str, ids: List[str], hdr: Dict[str, str]) -> List[Dict[str, Any]]:
+    details = []
+    for i in range(0, len(ids), 100):
+        params = {"Ids": ",".join(ids[i:i + 100]), "Fields": DETAIL_FIELDS}
+        r = client.SESSION.get(f"{client.EMBY_URL}/Users/{user_id}/Items", params=params, headers=hdr, timeout=30)
+        r.raise_for_status()
+        details.extend(r.json().get("Items", []))
+    return details
+
+def _write_movie(conn, user_id: str, movie: Dict[str, Any], played: bool):
+    movie_id = movie["Id"]
+    premiere = movie.get("PremiereDate") or ""
+    # Year of the premiere date (not ProductionYear) so year filters match the server's MinPremiereDate/MaxPremiereDate.
+    year = int(premiere[:4]) if premiere[:4].isdigit() else None
+
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO movie_index
+            (user_id, id, name, sort_name, premiere_date, year, date_created, runtime_ticks, played, date_last_saved)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (user_id, movie_id, movie.get("Name", ""), (movie.get("SortName") or movie.get("Name", "")).lower(),
+         premiere or None, year, movie.get("DateCreated"), movie.get("RunTimeTicks"), int(played),
+         movie.get("DateLastSaved"))
+    )
+
+    for table in ("movie_index_genres", "movie_index_studios", "movie_index_people"):
+        conn.execute(f"DELETE FROM {table} WHERE user_id = ? AND movie_id = ?", (user_id, movie_id))
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO movie_index_genres (user_id, genre, movie_id) VALUES (?, ?, ?)",
+        [(user_id, g.lower(), movie_id) for g in movie.get("Genres", []) if g]
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO movie_index_studios (user_id, studio, movie_id) VALUES (?, ?, ?)",
+        [(user_id, s["Name"].lower(), movie_id) for s in movie.get("Studios", []) if s.get("Name")]
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO movie_index_people (user_id, person_id, name, person_type, movie_id) VALUES (?, ?, ?, ?, ?)",
+        [(user_id, p.get("Id") or "", p.get("Name", "").lower(), (p.get("Type") or "").lower(), movie_id)
+         for p in movie.get("People", []) if p.get("Id") or p.get("Name")]
+    )
+
+def _delete_movies(conn, user_id: str, ids: List[str]):
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        for table, column in (("movie_index", "id"), ("movie_index_libraries", "movie_id"), ("movie_index_genres", "movie_id"),
+                              ("movie_index_studios", "movie_id"), ("movie_index_people", "movie_id")):
+            conn.execute(f"DELETE FROM {table} WHERE user_id = ? AND {column} IN ({marks})", [user_id, *chunk])
+
+def sync_movie_index(user_id: str, hdr: Dict[str, str], libraries: List[Dict[str, str]]) -> Dict[str, int]:
+    """
+    Brings the local movie mirror for a user up to date.
+    Lists every library cheaply (Id, DateLastSaved, play state), then downloads full metadata
+    only for movies that are new or whose DateLastSaved changed, and drops movies that disappeared.
+    """
+    if not _sync_lock.acquire(blocking=False):
+        logger.info("Movie index sync already in progress. Skipping.")
+        return {}
+
+    try:
+        listed: Dict[str, Dict[str, Any]] = {}
+        memberships: List[Tuple[str, str]] = []
+        for lib in libraries:
+            for item in _list_library_movies(user_id, lib["Id"], hdr):
+                listed[item["Id"]] = item
+                memberships.append((lib["Id"], item["Id"]))
+
+        with database.get_db_connection() as conn:
+            rows = conn.execute("SELECT id, date_last_saved, played FROM movie_index WHERE user_id = ?", (user_id,)).fetchall()
+        known = {row["id"]: (row["date_last_saved"], row["played"]) for row in rows}
+
+        changed_ids = [mid for mid, item in listed.items()
+                       if mid not in known or known[mid][0] != item.get("DateLastSaved")]
+        removed_ids = [mid for mid in known if mid not in listed]
+        played_updates = [(int(bool((item.get("UserData") or {}).get("Played"))), user_id, mid)
+                          for mid, item in listed.items()
+                          if mid in known and known[mid][1] != int(bool((item.get("UserData") or {}).get("Played")))]
+
+        details = _fetch_movie_details(user_id, changed_ids, hdr) if changed_ids else []
+
+        with database.get_db_connection() as conn:
+            with conn:
+                for movie in details:
+                    played = (listed.get(movie["Id"], {}).get("UserData") or {}).get("Played", False)
+                    _write_movie(conn, user_id, movie, played)
+                if removed_ids:
+                    _delete_movies(conn, user_id, removed_ids)
+                conn.executemany("UPDATE movie_index SET played = ? WHERE user_id = ? AND id = ?", played_updates)
+                conn.execute("DELETE FROM movie_index_libraries WHERE user_id = ?", (user_id,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO movie_index_libraries (user_id, library_id, movie_id) VALUES (?, ?, ?)",
+                    [(user_id, lib_id, mid) for lib_id, mid in memberships]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO movie_index_sync (user_id, last_sync, item_count) VALUES (?, ?, ?)",
+                    (user_id, datetime.now().isoformat(), len(listed))
+                )
+
+        stats = {"total": len(listed), "updated": len(details), "removed": len(removed_ids), "played_changes": len(played_updates)}
+        logger.info(f"Movie index synced for user {user_id}: {stats}")
+        return stats
+    except Exception as e:
+        logger.error(f"Movie index sync failed: {e}", exc_info=True)
+        return {}
+    finally:
+        _sync_lock.release()
+
+def refresh_movie_index():
+    """Syncs the mirror for the default user using the current auth and cached library list."""
+    import app_state
+    from app.cache import get_library_data
+
+    if not app_state.is_configured or not app_state.login_uid:
+        return
+    libraries = get_library_data().get("libraryData", [])
+    if libraries:
+        sync_movie_index(app_state.login_uid, app_state.HDR, libraries)
+
+def is_ready(user_id: str) -> bool:
+    try:
+        with database.get_db_connection() as conn:
+            row = conn.execute("SELECT 1 FROM movie_index_sync WHERE user_id = ?", (user_id,)).fetchone()
+        return row is not None
+    except Exception:
+        return False
+
+def _person_clause(people: List[Any], user_id: str, person_types: Optional[List[str]] = None) -> Tuple[str, List[Any]]:
+    ids = [p["Id"] for p in people if isinstance(p, dict) and p.get("Id")]
+    names = [(p.get("Name") if isinstance(p, dict) else p).lower() for p in people
+             if (isinstance(p, dict) and not p.get("Id") and p.get("Name")) or isinstance(p, str)]
+
+    conditions, params = [], []
+    if ids:
+        conditions.append(f"person_id IN ({','.join('?' * len(ids))})")
+        params.extend(ids)
+    if names:
+        conditions.append(f"name IN ({','.join('?' * len(names))})")
+        params.extend(names)
+    if not conditions:
+        return "", []
+
+    sql = f"SELECT movie_id FROM movie_index_people WHERE user_id = ? AND ({' OR '.join(conditions)})"
+    if person_types:
+        sql += f" AND person_type IN ({','.join('?' * len(person_types))})"
+        params.extend(person_types)
+    return sql, [user_id, *params]
+
+def _build_query(user_id: str, filters: Dict[str, Any], columns: str) -> Optional[Tuple[str, List[Any]]]:
+    """Translates movie block filters into SQL over the mirror. Returns None if a filter can't be answered locally."""
+    if filters.get("ids"):
+        return None
+
+    sort_by = filters.get("sort_by") or "Random"
+    if sort_by not in LOCAL_SORTS:
+        return None
+
+    where = ["m.user_id = ?"]
+    params: List[Any] = [user_id]
+
+    def add_subquery(negate: bool, table: str, column: str, values: List[str]):
+        marks = ",".join("?" * len(values))
+        where.append(f"m.id {'NOT IN' if negate else 'IN'} (SELECT movie_id FROM {table} WHERE user_id = ? AND {column} IN ({marks}))")
+        params.extend([user_id, *values])
+
+    if parent_ids := filters.get("parent_ids"):
+        with database.get_db_connection() as conn:
+            known = {row["library_id"] for row in conn.execute(
+                "SELECT DISTINCT library_id FROM movie_index_libraries WHERE user_id = ?", (user_id,)).fetchall()}
+        if not set(parent_ids).issubset(known):
+            return None
+        add_subquery(False, "movie_index_libraries", "library_id", list(parent_ids))
+
+    relative_days = filters.get("release_within_days")
+    if relative_days and int(relative_days) > 0:
+        where.append("substr(m.premiere_date, 1, 10) >= ?")
+        params.append((datetime.now() - timedelta(days=int(relative_days))).strftime("%Y-%m-%d"))
+    elif filters.get("year_from"):
+        where.append("m.year >= ?")
+        params.append(int(filters["year_from"]))
+
+    if filters.get("year_to"):
+        where.append("m.year <= ?")
+        params.append(int(filters["year_to"]))
+
+    watched_status = filters.get("watched_status")
+    if watched_status == "unplayed":
+        where.append("m.played = 0")
+    elif watched_status == "played":
+        where.append("m.played = 1")
+
+    people_any = filters.get("people", []) or []
+    people_all = filters.get("people_all", []) or []
+    combined_people = people_any + people_all
+    if combined_people:
+        person_types = sorted({p.get("Role", "").lower() for p in combined_people
+                               if isinstance(p, dict) and p.get("Role", "").lower() not in ["person", "any", ""]})
+        sql, sub_params = _person_clause(combined_people, user_id, person_types)
+        if sql:
+            where.append(f"m.id IN ({sql})")
+            params.extend(sub_params)
+
+    for p in people_all:
+        sql, sub_params = _person_clause([p], user_id)
+        if sql:
+            where.append(f"m.id IN ({sql})")
+            params.extend(sub_params)
+
+    if exclude_people := filters.get("exclude_people"):
+        exclude_ids = [p.get("Id") if isinstance(p, dict) else p for p in exclude_people]
+        exclude_ids = [pid for pid in exclude_ids if pid]
+        if exclude_ids:
+            add_subquery(True, "movie_index_people", "person_id", exclude_ids)
+
+    if studios := filters.get("studios"):
+        add_subquery(False, "movie_index_studios", "studio", [s.lower() for s in studios])
+    if exclude_studios := filters.get("exclude_studios"):
+        add_subquery(True, "movie_index_studios", "studio", [s.lower() for s in exclude_studios])
+
+    if genres_any := filters.get("genres_any"):
+        add_subquery(False, "movie_index_genres", "genre", [g.lower() for g in genres_any])
+    for genre in filters.get("genres_all") or []:
+        add_subquery(False, "movie_index_genres", "genre", [genre.lower()])
+    if genres_exclude := filters.get("genres_exclude"):
+        add_subquery(True, "movie_index_genres", "genre", [g.lower() for g in genres_exclude])
+
+    sql = f"SELECT {columns} FROM movie_index m WHERE {' AND '.join(where)}"
+    return sql, params
+
+def query_movies(user_id: str, filters: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Evaluates filters against the local mirror and returns ordered {"Id", "RunTimeTicks"} rows,
+    or None when the mirror isn't ready or the filters need the server.
+    """
+    if not is_ready(user_id):
+        return None
+    try:
+        query = _build_query(user_id, filters, "m.id, m.runtime_ticks")
+        if query is None:
+            return None
+        sql, params = query
+        sql += f" ORDER BY {LOCAL_SORTS[filters.get('sort_by') or 'Random']}"
+        with database.get_db_connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{"Id": row["id"], "RunTimeTicks": row["runtime_ticks"]} for row in rows]
+    except Exception as e:
+        logger.warning(f"Local movie query failed, falling back to server: {e}")
+        return None
+
+def count_movies(user_id: str, filters: Dict[str, Any]) -> Optional[int]:
+    """Counts matching movies locally. Returns None when the server must be asked instead."""
+    if not is_ready(user_id):
+        return None
+    try:
+        query = _build_query(user_id, filters, "COUNT(*)")
+        if query is None:
+            return None
+        sql, params = query
+        with database.get_db_connection() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+    except Exception as e:
+        logger.warning(f"Local movie count failed, falling back to server: {e}")
+        return None
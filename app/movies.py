@@ -4,13 +4,16 @@ app/movies.py - All movie-related logic
 
 import random
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
 
-from . import client
+from . import client, movie_index
 from app.logger import get_logger
 
 logger = get_logger("MixerBee.Movies")
 
+MOVIE_FIELDS = "Genres,PremiereDate,UserData,RunTimeTicks,Studios,People"
+
 def get_movie_libraries(user_id: str, hdr: Dict[str, str]) -> List[Dict[str, str]]:
     """Fetches all movie libraries (folders) a specific user can see."""
     logger.info(f"Fetching movie libraries for user {user_id}...")
@@ -40,12 +43,15 @@ def find_movies(user_id: str, filters: Dict,
                 hdr: Dict[str, str]) -> List[Dict[str, str]]:
     """Finds movies based on a set of filters."""
     logger.info(f"Finding movies for user {user_id} with filters: {filters}")
-    
+
+    local_rows = movie_index.query_movies(user_id, filters)
+    if local_rows is not None:
+        return _find_movies_local(user_id, local_rows, filters, hdr)
+
     base_params = {
         "IncludeItemTypes": "Movie",
         "Recursive": "true",
-        "Fields": "Genres,PremiereDate,UserData,RunTimeTicks,Studios,People",
-        "Limit": 2000
+        "Fields": MOVIE_FIELDS
     }
 
     if filters.get("parent_ids"):
@@ -71,8 +77,16 @@ def find_movies(user_id: str, filters: Dict,
         base_params["IsPlayed"] = "true"
 
     sort_by = filters.get("sort_by", "Random")
+    limit = int(filters["limit"]) if filters.get("limit") else None
+    has_local_filter = any(filters.get(k) for k in LOCAL_FILTER_KEYS)
+    # The server re-draws SortBy=Random on every page, so a random order is only requested when
+    # one page already holds the full answer. Otherwise page by name and sample locally.
+    server_random = (sort_by == "Random" and limit is not None and limit <= client.DEFAULT_PAGE_SIZE
+                     and not has_local_filter and not filters.get("duration_minutes"))
+    shuffle_locally = sort_by == "Random" and not server_random
+    page_size = limit if server_random else client.DEFAULT_PAGE_SIZE
     if sort_by == "Random":
-        base_params["SortBy"] = "Random"
+        base_params["SortBy"] = "Random" if server_random else "SortName"
     else:
         base_params["SortBy"] = sort_by
         if sort_by == "DateCreated":
@@ -123,27 +137,23 @@ def find_movies(user_id: str, filters: Dict,
     else:
         endpoint_url = f"{client.EMBY_URL}/Users/{user_id}/Items"
 
-    r = client.SESSION.get(endpoint_url, params=base_params, headers=hdr, timeout=30)
-    r.raise_for_status()
-    all_movies = r.json().get("Items", [])
+    all_movies = client.paginate_items(endpoint_url, base_params, hdr, page_size=page_size)
 
     # --- AND Logic for People ---
     if people_all:
         required_ids = {p["Id"] for p in people_all if isinstance(p, dict) and p.get("Id")}
         required_names = {p["Name"].lower() for p in people_all if isinstance(p, dict) and not p.get("Id") and p.get("Name")}
 
-        filtered_by_people = []
-        for m in all_movies:
+        def has_all_people(m):
             movie_people = m.get("People", [])
             movie_person_ids = {p.get("Id") for p in movie_people}
             movie_person_names = {p.get("Name", "").lower() for p in movie_people}
 
             id_match = required_ids.issubset(movie_person_ids) if required_ids else True
             name_match = required_names.issubset(movie_person_names) if required_names else True
+            return id_match and name_match
 
-            if id_match and name_match:
-                filtered_by_people.append(m)
-        all_movies = filtered_by_people
+        all_movies = (m for m in all_movies if has_all_people(m))
 
     # --- Studio Filtering ---
     def get_movie_studio_set(movie):
@@ -152,12 +162,12 @@ def find_movies(user_id: str, filters: Dict,
     studios_to_search = filters.get("studios")
     if studios_to_search:
         required_studios = {s.lower() for s in studios_to_search}
-        all_movies = [m for m in all_movies if get_movie_studio_set(m).intersection(required_studios)]
+        all_movies = (m for m in all_movies if get_movie_studio_set(m).intersection(required_studios))
 
     studios_to_exclude = filters.get("exclude_studios")
     if studios_to_exclude:
         exclude_studios = {s.lower() for s in studios_to_exclude}
-        all_movies = [m for m in all_movies if not get_movie_studio_set(m).intersection(exclude_studios)]
+        all_movies = (m for m in all_movies if not get_movie_studio_set(m).intersection(exclude_studios))
 
     def get_movie_genre_set(movie):
         return {g.lower() for g in movie.get("Genres", [])}
@@ -165,36 +175,100 @@ def find_movies(user_id: str, filters: Dict,
     genres_any = filters.get("genres_any")
     if genres_any:
         required_genres_any = {g.lower() for g in genres_any}
-        all_movies = [m for m in all_movies if get_movie_genre_set(m).intersection(required_genres_any)]
+        all_movies = (m for m in all_movies if get_movie_genre_set(m).intersection(required_genres_any))
 
     genres_all = filters.get("genres_all")
     if genres_all:
         required_genres_all = {g.lower() for g in genres_all}
-        all_movies = [m for m in all_movies if required_genres_all.issubset(get_movie_genre_set(m))]
+        all_movies = (m for m in all_movies if required_genres_all.issubset(get_movie_genre_set(m)))
 
     genres_exclude = filters.get("genres_exclude")
     if genres_exclude:
         exclude_genres = {g.lower() for g in genres_exclude}
-        all_movies = [m for m in all_movies if not get_movie_genre_set(m).intersection(exclude_genres)]
-
-    final_list = all_movies
-    logger.info(f"Local filtering complete. {len(final_list)} movies match criteria.")
-
+        all_movies = (m for m in all_movies if not get_movie_genre_set(m).intersection(exclude_genres))
+
+    if shuffle_locally:
+        sample_size = _random_sample_size(filters)
+        if sample_size is None:
+            matches = list(all_movies)
+            random.shuffle(matches)
+        else:
+            matches = client.reservoir_sample(all_movies, sample_size)
+        logger.info(f"Local filtering complete. Picked {len(matches)} movies at random.")
+        all_movies = matches
+
+    final_list = _apply_duration_and_limit(all_movies, filters)
+    logger.info(f"Streaming selection complete. Returning {len(final_list)} movies.")
+    return final_list
+
+DURATION_SLACK_TICKS = 5 * 60 * 10000000
+# A random duration fill samples target / DURATION_SAMPLE_MINUTES_PER_MOVIE movies, plus spares
+# for the ones that do not fit, instead of holding every match in memory.
+DURATION_SAMPLE_MINUTES_PER_MOVIE = 30
+DURATION_SAMPLE_SPARE = 20
+LOCAL_FILTER_KEYS = ("people_all", "studios", "exclude_studios", "genres_any", "genres_all", "genres_exclude")
+
+def _random_sample_size(filters: Dict) -> Optional[int]:
+    """
+    How many random matches _apply_duration_and_limit can use: the limit, or enough short
+    movies to fill the duration target. None means every match is returned.
+    """
+    target_duration_minutes = filters.get("duration_minutes")
+    if target_duration_minutes:
+        return int(target_duration_minutes) // DURATION_SAMPLE_MINUTES_PER_MOVIE + DURATION_SAMPLE_SPARE
+    limit = filters.get("limit")
+    return int(limit) if limit else None
+
+def _apply_duration_and_limit(movies: Iterable[Dict], filters: Dict) -> List[Dict]:
+    """
+    Applies the duration target (greedy fill in list order) or the count limit.
+    Consumes the input lazily and stops as soon as the limit is reached or the duration
+    target is filled to within DURATION_SLACK_TICKS.
+    """
     target_duration_minutes = filters.get("duration_minutes")
     if target_duration_minutes:
         target_duration_ticks = int(target_duration_minutes) * 60 * 10000000
         playlist_movies = []
         current_duration_ticks = 0
-        for movie in final_list:
+        for movie in movies:
             runtime_ticks = movie.get("RunTimeTicks")
             if runtime_ticks:
                 if current_duration_ticks + runtime_ticks <= target_duration_ticks:
                     playlist_movies.append(movie)
                     current_duration_ticks += runtime_ticks
+                    if target_duration_ticks - current_duration_ticks < DURATION_SLACK_TICKS:
+                        break
         return playlist_movies
 
     limit = filters.get("limit")
     if limit:
-        return final_list[:int(limit)]
-
-    return final_list
\ No newline at end of file
+        return list(islice(movies, int(limit)))
+
+    return list(movies)
+
+def _fetch_movies_by_ids(user_id: str, ids: List[str], hdr: Dict[str, str]) -> Dict[str, Dict]:
+    found = {}
+    for i in range(0, len(ids), 150):
+        params = {"Ids": ",".join(ids[i:i + 150]), "Fields": MOVIE_FIELDS}
+        r = client.SESSION.get(f"{client.EMBY_URL}/Users/{user_id}/Items", params=params, headers=hdr, timeout=30)
+        r.raise_for_status()
+        found.update({m["Id"]: m for m in r.json().get("Items", [])})
+    return found
+
+def _find_movies_local(user_id: str, rows: List[Dict], filters: Dict, hdr: Dict[str, str]) -> List[Dict]:
+    """
+    Selects movies from locally evaluated rows, then validates only the chosen IDs against the server.
+    Movies deleted since the last index sync are dropped and the selection is re-run without them.
+    """
+    missing = set()
+    for _ in range(3):
+        chosen = _apply_duration_and_limit([row for row in rows if row["Id"] not in missing], filters)
+        found = _fetch_movies_by_ids(user_id, [row["Id"] for row in chosen], hdr)
+        newly_missing = {row["Id"] for row in chosen} - found.keys()
+        if not newly_missing:
+            break
+        missing |= newly_missing
+
+    final_list = [found[row["Id"]] for row in chosen if row["Id"] in found]
+    logger.info(f"Local index matched {len(rows)} movies; returning {len(final_list)} validated movies.")
+    return final_list
@@ -3,7 +3,10 @@ app/music.py - All music-related logic
 """
 
 import random
-from typing import Dict, List, Optional
+import threading
+import time
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Tuple
 import requests
 
 from . import client
@@ -14,6 +17,7 @@ logger = get_logger("MixerBee.Music")
 def get_music_genres(user_id: str, hdr: Dict[str, str]) -> List[Dict[str, str]]:
     """
     Fetches all music genres for a user by aggregating them from all albums.
+    Request errors propagate so the cache refresher keeps its previous value.
     """
     logger.info(f"Aggregating music genres for user {user_id}. Using MusicAlbums to optimize payload...")
 
@@ -24,29 +28,23 @@ def get_music_genres(user_id: str, hdr: Dict[str, str]) -> List[Dict[str, str]]:
         "UserId": user_id
     }
 
-    try:
-        r = client.SESSION.get(f"{client.EMBY_URL}/Users/{user_id}/Items", params=params, headers=hdr, timeout=60)
-        r.raise_for_status()
-
-        all_albums = r.json().get("Items", [])
+    r = client.SESSION.get(f"{client.EMBY_URL}/Users/{user_id}/Items", params=params, headers=hdr, timeout=60)
+    r.raise_for_status()
 
-        if not all_albums:
-            logger.info(f"No music albums found for user {user_id}. Returning empty genre list.")
-            return []
+    all_albums = r.json().get("Items", [])
 
-        unique_genres = set()
-        for album in all_albums:
-            for genre_name in album.get("Genres", []):
-                unique_genres.add(genre_name)
+    if not all_albums:
+        logger.info(f"No music albums found for user {user_id}. Returning empty genre list.")
+        return []
 
-        logger.info(f"Found {len(unique_genres)} unique music genres for user {user_id} across {len(all_albums)} albums.")
+    unique_genres = set()
+    for album in all_albums:
+        for genre_name in album.get("Genres", []):
+            unique_genres.add(genre_name)
 
-        genre_list = [{"Name": name, "Id": name} for name in sorted(list(unique_genres))]
-        return genre_list
+    logger.info(f"Found {len(unique_genres)} unique music genres for user {user_id} across {len(all_albums)} albums.")
 
-    except Exception as e:
-        logger.error(f"Failed to aggregate music genres for user {user_id}: {e}", exc_info=True)
-        return []
+    return [{"Name": name, "Id": name} for name in sorted(unique_genres)]
 
 def get_music_artists(hdr: Dict[str, str]) -> List[Dict[str, str]]:
     """Fetches all music artists from Emby for the user specified in the header."""
@@ -176,58 +174,137 @@ def get_songs_by_artist(artist_id: str, hdr: Dict[str, str], sort: str = "PlayCo
     logger.info(f"Returning {len(songs)} tracks for artist.")
     return songs
 
-def find_songs(user_id: str, filters: Dict, hdr: Dict[str, str]) -> List[Dict[str, str]]:
-    """Finds songs based on a set of filters, utilizing API randomness where possible."""
-    logger.info(f"Finding songs for user {user_id} with filters: {filters}")
-    
-    base_params = {
+MUSIC_GENRE_ID_TTL_SECONDS = 600
+
+_music_genre_ids: Dict[str, Dict[str, str]] = {}
+_music_genre_ids_fetched: Dict[str, float] = {}
+_music_genre_ids_lock = threading.Lock()
+
+def _get_music_genre_ids(user_id: str, hdr: Dict[str, str]) -> Dict[str, str]:
+    """Returns a cached lowercase genre name -> genre Id map from /MusicGenres."""
+    with _music_genre_ids_lock:
+        fetched = _music_genre_ids_fetched.get(user_id)
+        if fetched is not None and time.monotonic() - fetched < MUSIC_GENRE_ID_TTL_SECONDS:
+            return _music_genre_ids[user_id]
+
+    params = {"UserId": user_id, "Recursive": "true", "Fields": "Id,Name"}
+    r = client.SESSION.get(f"{client.EMBY_URL}/MusicGenres", params=params, headers=hdr, timeout=15)
+    r.raise_for_status()
+    genre_ids = {g["Name"].lower(): g["Id"] for g in r.json().get("Items", []) if g.get("Name") and g.get("Id")}
+
+    with _music_genre_ids_lock:
+        _music_genre_ids[user_id] = genre_ids
+        _music_genre_ids_fetched[user_id] = time.monotonic()
+    return genre_ids
+
+def _build_song_query(user_id: str, filters: Dict, hdr: Dict[str, str]) -> Tuple[Dict, Optional[Callable[[Dict], bool]], str]:
+    """
+    Translates song filters into Emby query params plus an optional local predicate.
+    "any" and "none" genre matching run entirely on the server; "all" narrows server-side
+    to songs with any of the genres and checks the rest locally.
+    Returns (params, predicate, genre_mode) where genre_mode is "server", "hybrid" or "local".
+    """
+    params = {
         "IncludeItemTypes": "Audio",
         "Recursive": "true",
         "UserId": user_id,
-        "Fields": "Genres,UserData,PlayCount,ArtistItems,Album",
-        "Limit": 3000
+        "Fields": "Genres,UserData,PlayCount,ArtistItems,Album"
     }
 
     sort_by = filters.get("sort_by", "Random")
     if sort_by == "Random":
-        base_params["SortBy"] = "Random"
+        params["SortBy"] = "Random"
     else:
-        base_params["SortBy"] = sort_by
+        params["SortBy"] = sort_by
         if sort_by in ("PlayCount", "DateCreated"):
-            base_params["SortOrder"] = "Descending"
-
-    r = client.SESSION.get(f"{client.EMBY_URL}/Users/{user_id}/Items", params=base_params, headers=hdr, timeout=30)
-    r.raise_for_status()
-    all_songs = r.json().get("Items", [])
-    logger.info(f"Retrieved {len(all_songs)} initial songs from API.")
+            params["SortOrder"] = "Descending"
 
     genres_to_search = filters.get("genres")
-    if genres_to_search:
-        genre_match_type = filters.get("genre_match", "any")
-        required_genres = set(g.lower() for g in genres_to_search)
-
-        if genre_match_type == "any":
-            all_songs = [
-                s for s in all_songs
-                if required_genres.intersection(set(g.lower() for g in s.get("Genres", [])))
-            ]
-        elif genre_match_type == "all":
-            all_songs = [
-                s for s in all_songs
-                if required_genres.issubset(set(g.lower() for g in s.get("Genres", [])))
-            ]
-        elif genre_match_type == "none":
-            all_songs = [
-                s for s in all_songs
-                if not required_genres.intersection(set(g.lower() for g in s.get("Genres", [])))
-            ]
-
-    final_list = all_songs
-    logger.info(f"Local filtering complete. {len(final_list)} songs match criteria.")
-
-    limit = filters.get("limit")
+    if not genres_to_search:
+        return params, None, "server"
+
+    genre_match_type = filters.get("genre_match", "any")
+    required_genres = set(g.lower() for g in genres_to_search)
+
+    def song_genres(song):
+        return set(g.lower() for g in song.get("Genres", []))
+
+    if genre_match_type == "any":
+        params["Genres"] = "|".join(genres_to_search)
+        return params, None, "server"
+
+    if genre_match_type == "all":
+        params["Genres"] = "|".join(genres_to_search)
+        return params, lambda s: required_genres.issubset(song_genres(s)), "hybrid"
+
+    if genre_match_type == "none":
+        try:
+            genre_ids = _get_music_genre_ids(user_id, hdr)
+        except requests.RequestException as e:
+            logger.warning(f"Could not resolve music genre ids, filtering locally: {e}")
+            genre_ids = {}
+        if all(g in genre_ids for g in required_genres):
+            params["ExcludeGenreIds"] = ",".join(genre_ids[g] for g in required_genres)
+            return params, None, "server"
+        return params, lambda s: not required_genres.intersection(song_genres(s)), "local"
+
+    return params, None, "server"
+
+def find_songs(user_id: str, filters: Dict, hdr: Dict[str, str],
+               report: Optional[Dict] = None) -> List[Dict[str, str]]:
+    """
+    Finds songs based on a set of filters, utilizing API randomness where possible.
+    If a report dict is given, the genre filtering mode used is stored under "genre_mode".
+    """
+    logger.info(f"Finding songs for user {user_id} with filters: {filters}")
+
+    base_params, predicate, genre_mode = _build_song_query(user_id, filters, hdr)
+    if report is not None:
+        report["genre_mode"] = genre_mode
+
+    limit = int(filters["limit"]) if filters.get("limit") is not None else None
+    # The server re-draws SortBy=Random on every page, so a random order is only requested when
+    # one page already holds the full answer. Otherwise page by name and sample locally.
+    random_order = base_params["SortBy"] == "Random"
+    server_random = random_order and limit is not None and predicate is None and limit <= client.DEFAULT_PAGE_SIZE
+    if random_order and not server_random:
+        base_params["SortBy"] = "SortName"
+
+    page_size = client.DEFAULT_PAGE_SIZE
+    if limit is not None and predicate is None:
+        page_size = max(1, min(limit, page_size))
+
+    all_songs = client.paginate_items(f"{client.EMBY_URL}/Users/{user_id}/Items", base_params, hdr, page_size=page_size)
+    if predicate is not None:
+        all_songs = (s for s in all_songs if predicate(s))
+
     if limit is not None:
-        logger.info(f"Applying count limit. Returning {int(limit)} songs.")
-        return final_list[:int(limit)]
+        if random_order and not server_random:
+            final_list = client.reservoir_sample(all_songs, limit)
+        else:
+            final_list = list(islice(all_songs, limit))
+        logger.info(f"Applying count limit ({genre_mode} genre filtering). Returning {len(final_list)} songs.")
+        return final_list
+
+    final_list = list(all_songs)
+    if random_order:
+        random.shuffle(final_list)
+    logger.info(f"Filtering complete ({genre_mode} genre filtering). {len(final_list)} songs match criteria.")
+    return final_list
+
+def count_songs(user_id: str, filters: Dict, hdr: Dict[str, str]) -> Tuple[int, str]:
+    """
+    Counts songs matching the filters. Fully server-side queries only read TotalRecordCount.
+    Returns (count, genre_mode).
+    """
+    base_params, predicate, genre_mode = _build_song_query(user_id, filters, hdr)
+    if predicate is None:
+        params = {**base_params, "Limit": 0, "SortBy": "SortName", "Fields": "Id"}
+        r = client.SESSION.get(f"{client.EMBY_URL}/Users/{user_id}/Items", params=params, headers=hdr, timeout=30)
+        r.raise_for_status()
+        return r.json().get("TotalRecordCount", 0), genre_mode
 
-    return final_list
\ No newline at end of file
+    base_params["SortBy"] = "SortName"
+    base_params["Fields"] = "Genres"
+    count = sum(1 for s in client.paginate_items(f"{client.EMBY_URL}/Users/{user_id}/Items", base_params, hdr) if predicate(s))
+    return count, genre_mode
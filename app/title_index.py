@@ -0,0 +1,148 @@
+"""
+app/title_index.py - In-memory title index for typeahead media search
+"""
+
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List
+
+from app.logger import get_logger
+
+logger = get_logger("MixerBee.TitleIndex")
+
+PREFIX_MAX = 12
+COLLECTIONS_TTL_SECONDS = 300
+
+_media: Dict[str, Dict[str, Any]] = {}
+_collections: Dict[str, Dict[str, Any]] = {}
+_media_loaded = False
+_collections_loaded_at = 0.0
+_lock = threading.Lock()
+# Collections get their own small snapshot so refreshing them never rebuilds the media index.
+_media_snapshot: Dict[str, Any] = {"entries": [], "names": [], "tokens": [], "prefixes": {}}
+_collections_snapshot: Dict[str, Any] = {"entries": [], "names": [], "tokens": [], "prefixes": {}}
+
+def normalize(text: str) -> str:
+    """Lowercases, strips accents and collapses punctuation to single spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return re.sub(r"[\W_]+", " ", text).strip()
+
+def _build(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    names, tokens = [], []
+    prefixes: Dict[str, List[int]] = {}
+    for idx, entry in enumerate(entries):
+        name = normalize(entry["Name"])
+        words = set(name.split())
+        names.append(name)
+        tokens.append(words)
+        keys = set()
+        for word in words:
+            for end in range(1, min(len(word), PREFIX_MAX) + 1):
+                keys.add(word[:end])
+        for key in keys:
+            prefixes.setdefault(key, []).append(idx)
+    return {"entries": entries, "names": names, "tokens": tokens, "prefixes": prefixes}
+
+def _rebuild():
+    """Rebuilds the media lookup structures and swaps them in. Call with _lock held."""
+    global _media_snapshot
+    started = time.monotonic()
+    _media_snapshot = _build(list(_media.values()))
+    logger.debug(f"Title index rebuilt with {len(_media_snapshot['entries'])} titles in {time.monotonic() - started:.3f}s.")
+
+def _entry(item_id: str, name: str, year: Any, item_type: str) -> Dict[str, Any]:
+    return {"Id": item_id, "Name": name, "Year": year if year is not None else "", "Type": item_type or ""}
+
+def set_media(rows: Iterable[Dict[str, Any]]):
+    """Replaces all movie/series titles. Rows need Id, Name, Year and Type."""
+    global _media_loaded
+    with _lock:
+        _media.clear()
+        for row in rows:
+            _media[row["Id"]] = _entry(row["Id"], row.get("Name", ""), row.get("Year"), row.get("Type"))
+        _media_loaded = True
+        _rebuild()
+    logger.info(f"Title index loaded {len(_media)} media titles.")
+
+def update_media(upserts: Iterable[Dict[str, Any]] = (), removed_ids: Iterable[str] = ()):
+    """Applies added/changed and removed movie/series titles with a single rebuild."""
+    with _lock:
+        for item_id in removed_ids:
+            _media.pop(item_id, None)
+        for row in upserts:
+            _media[row["Id"]] = _entry(row["Id"], row.get("Name", ""), row.get("Year"), row.get("Type"))
+        _rebuild()
+
+def set_collections(rows: Iterable[Dict[str, Any]]):
+    """Replaces the collection titles."""
+    global _collections_loaded_at, _collections_snapshot
+    with _lock:
+        _collections.clear()
+        for row in rows:
+            if row.get("Id") and row.get("Name"):
+                _collections[row["Id"]] = _entry(row["Id"], row["Name"], "", "Collection")
+        _collections_loaded_at = time.monotonic()
+        _collections_snapshot = _build(list(_collections.values()))
+
+def defer_collections():
+    """Keeps the current collection titles for another TTL, e.g. after a failed fetch."""
+    global _collections_loaded_at
+    _collections_loaded_at = time.monotonic()
+
+def is_media_loaded() -> bool:
+    return _media_loaded
+
+def collections_stale() -> bool:
+    return time.monotonic() - _collections_loaded_at > COLLECTIONS_TTL_SECONDS
+
+def _candidates(snap: Dict[str, Any], terms: List[str]) -> set:
+    """Indexes of titles in snap where every term prefixes one of the title's words."""
+    candidate_sets = []
+    for term in terms:
+        postings = snap["prefixes"].get(term[:PREFIX_MAX], [])
+        if len(term) > PREFIX_MAX:
+            postings = [i for i in postings if any(w.startswith(term) for w in snap["tokens"][i])]
+        candidate_sets.append(postings)
+
+    candidate_sets.sort(key=len)
+    candidates = set(candidate_sets[0]) if candidate_sets else set()
+    for postings in candidate_sets[1:]:
+        if not candidates:
+            break
+        candidates.intersection_update(postings)
+    return candidates
+
+def search(query: str, limit: int = 15) -> List[Dict[str, Any]]:
+    """
+    Ranked typeahead search. Every query word must prefix a word of the title; ranking is
+    exact title, then title prefix, then whole-word matches, then prefix matches, with shorter
+    titles first. Falls back to a substring scan when no title matches by word prefix.
+    """
+    needle = normalize(query)
+    if not needle:
+        return []
+
+    terms = needle.split()
+    snapshots = (_collections_snapshot, _media_snapshot)
+    scored = []
+    for source, snap in enumerate(snapshots):
+        for i in _candidates(snap, terms):
+            name = snap["names"][i]
+            if name == needle:
+                rank = 0
+            elif name.startswith(needle):
+                rank = 1
+            elif all(term in snap["tokens"][i] for term in terms):
+                rank = 2
+            else:
+                rank = 3
+            scored.append((rank, len(name), name, source, i))
+    if not scored:
+        for source, snap in enumerate(snapshots):
+            scored.extend((4, len(name), name, source, i) for i, name in enumerate(snap["names"]) if needle in name)
+
+    return [dict(snapshots[source]["entries"][i]) for _, _, _, source, i in heapq.nsmallest(limit, scored)]
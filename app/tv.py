@@ -3,7 +3,10 @@ app/tv.py - All TV show and episode related logic
 """
 
 import random
-from typing import Dict, List, Optional
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
 
 from . import client
 from app.logger import get_logger
@@ -47,47 +50,120 @@ def series_id(name: str, hdr: Dict[str, str]) -> Optional[str]:
             return it["Id"]
     return None
 
-def episodes(sid: str, season: int, episode: int, count: int,
-             hdr: Dict[str, str], user_id: str, end_season: Optional[int] = None,
-             end_episode: Optional[int] = None, only_unwatched: bool = True) -> List[Dict]:
+EPISODE_CACHE_TTL_SECONDS = 300
+EPISODE_CACHE_MAX_ENTRIES = 2000
+
+class EpisodeIndex:
     """
-    Gets a list of episodes for a series, either by count or within a specified S/E range.
-    Respects the only_unwatched flag to allow for rewatches.
+    A sorted, per-(user, series) view of a show's episodes.
+    Keys are (season, episode) tuples kept parallel to the episode list so lookups can bisect instead of re-sorting.
     """
-    params = {
-        "UserId": user_id,
-        "Fields": "UserData,ParentIndexNumber,IndexNumber"
-    }
+    def __init__(self, items: List[Dict]):
+        all_eps = sorted(items, key=_episode_key)
+        self.keys = [_episode_key(ep) for ep in all_eps]
+        self.episodes = all_eps
+        unwatched = [ep for ep in all_eps if not (ep.get("UserData") or {}).get("Played", False)]
+        self.unwatched_keys = [_episode_key(ep) for ep in unwatched]
+        self.unwatched = unwatched
+        self.created = time.time()
+
+    def _view(self, only_unwatched: bool) -> Tuple[List[Tuple[int, int]], List[Dict]]:
+        return (self.unwatched_keys, self.unwatched) if only_unwatched else (self.keys, self.episodes)
+
+    def first(self, only_unwatched: bool = False) -> Optional[Dict]:
+        """First regular (non-special) episode, skipping season 0."""
+        keys, eps = self._view(only_unwatched)
+        pos = bisect_left(keys, (1,))
+        return dict(eps[pos]) if pos < len(eps) else None
+
+    def find(self, season: int, episode: int) -> Optional[Dict]:
+        pos = bisect_left(self.keys, (season, episode))
+        if pos < len(self.keys) and self.keys[pos] == (season, episode):
+            return dict(self.episodes[pos])
+        return None
+
+    def range(self, season: int, episode: int, count: int, end_season: Optional[int] = None,
+              end_episode: Optional[int] = None, only_unwatched: bool = True) -> List[Dict]:
+        keys, eps = self._view(only_unwatched)
+        start = bisect_left(keys, max((season, episode), (1,)))
+        if end_season is not None and end_episode is not None:
+            stop = bisect_right(keys, (end_season, end_episode))
+        else:
+            stop = start + count
+        return [dict(ep) for ep in eps[start:stop]]
 
-    if only_unwatched:
-        params["IsPlayed"] = "false"
+    def regular(self, only_unwatched: bool = False) -> List[Dict]:
+        keys, eps = self._view(only_unwatched)
+        return eps[bisect_left(keys, (1,)):]
 
-    try:
-        r = client.SESSION.get(f"{client.EMBY_URL}/Shows/{sid}/Episodes",
-                               params=params, headers=hdr, timeout=10)
-        r.raise_for_status()
+def _episode_key(ep: Dict) -> Tuple[int, int]:
+    return (ep.get("ParentIndexNumber") or 0, ep.get("IndexNumber") or 0)
 
-        all_eps = sorted(r.json()["Items"],
-                         key=lambda x: (x.get("ParentIndexNumber") or 0,
-                                        x.get("IndexNumber") or 0))
+_episode_cache: Dict[Tuple[str, str], EpisodeIndex] = {}
+_episode_cache_lock = threading.Lock()
 
-        all_eps = [ep for ep in all_eps if ep.get("ParentIndexNumber", 0) > 0]
+def get_episode_index(series_id: str, user_id: Optional[str], hdr: Dict[str, str]) -> EpisodeIndex:
+    """
+    Returns the cached episode index for a series, fetching the full episode list once per TTL.
+    Raises on network errors so callers keep their existing error handling.
+    """
+    user_id = user_id or hdr.get("X-Emby-User-Id") or ""
+    cache_key = (user_id, series_id)
+    now = time.time()
 
-        start_eps = [ep for ep in all_eps
-                     if ep.get("ParentIndexNumber", 0) > season
-                     or (ep.get("ParentIndexNumber", 0) == season
-                         and ep.get("IndexNumber", 0) >= episode)]
+    with _episode_cache_lock:
+        index = _episode_cache.get(cache_key)
+        if index and now - index.created < EPISODE_CACHE_TTL_SECONDS:
+            return index
 
-        if end_season is not None and end_episode is not None:
-            ranged_eps = [ep for ep in start_eps
-                          if ep.get("ParentIndexNumber", 0) < end_season
-                          or (ep.get("ParentIndexNumber", 0) == end_season
-                              and ep.get("IndexNumber", 0) <= end_episode)]
+    params = {"Fields": "Name,UserData,ParentIndexNumber,IndexNumber,DateCreated"}
+    if user_id:
+        params["UserId"] = user_id
+
+    r = client.SESSION.get(f"{client.EMBY_URL}/Shows/{series_id}/Episodes",
+                           params=params, headers=hdr, timeout=15)
+    r.raise_for_status()
+    index = EpisodeIndex(r.json().get("Items", []))
+
+    with _episode_cache_lock:
+        if len(_episode_cache) >= EPISODE_CACHE_MAX_ENTRIES:
+            for key in [k for k, v in _episode_cache.items() if now - v.created >= EPISODE_CACHE_TTL_SECONDS]:
+                del _episode_cache[key]
+            if len(_episode_cache) >= EPISODE_CACHE_MAX_ENTRIES:
+                _episode_cache.clear()
+        _episode_cache[cache_key] = index
+
+    return index
 
-            return ranged_eps
+def invalidate_episode_cache(user_id: Optional[str] = None, series_id: Optional[str] = None):
+    """
+    Drops cached episode indexes. A series_id drops that show for every user, a user_id drops
+    everything cached for that user, and no arguments clears the whole cache.
+    """
+    with _episode_cache_lock:
+        if series_id:
+            stale = [k for k in _episode_cache if k[1] == series_id]
+        elif user_id:
+            stale = [k for k in _episode_cache if k[0] == user_id]
         else:
-            return start_eps[:count]
+            stale = list(_episode_cache)
+        for key in stale:
+            del _episode_cache[key]
+
+    if stale:
+        logger.info(f"TV: Invalidated {len(stale)} cached episode index(es) (user={user_id}, series={series_id}).")
 
+def episodes(sid: str, season: int, episode: int, count: int,
+             hdr: Dict[str, str], user_id: str, end_season: Optional[int] = None,
+             end_episode: Optional[int] = None, only_unwatched: bool = True) -> List[Dict]:
+    """
+    Gets a list of episodes for a series, either by count or within a specified S/E range.
+    Respects the only_unwatched flag to allow for rewatches.
+    """
+    try:
+        index = get_episode_index(sid, user_id, hdr)
+        return index.range(season, episode, count, end_season=end_season,
+                           end_episode=end_episode, only_unwatched=only_unwatched)
     except Exception as e:
         logger.warning(f"TV: Failed to fetch episodes for series {sid}: {e}")
         return []
@@ -96,39 +172,15 @@ def get_specific_episode(series_id: str, season: int,
                          episode: int, hdr: Dict[str, str]) -> Optional[Dict]:
     """Gets data for a single, specific episode."""
     try:
-        r = client.SESSION.get(f"{client.EMBY_URL}/Shows/{series_id}/Episodes",
-                               params={"Season": season,
-                                       "Fields": "Name,ParentIndexNumber,IndexNumber"},
-                               headers=hdr, timeout=10)
-        r.raise_for_status()
-        items = r.json().get("Items", [])
-
-        for item in items:
-            if item.get("IndexNumber") == episode:
-                return item
+        return get_episode_index(series_id, None, hdr).find(season, episode)
     except Exception:
         pass
     return None
 
 def get_first_available_episode(series_id: str, user_id: str, hdr: Dict[str, str]) -> Optional[Dict]:
     """Finds the very first available episode for a series in the user's library (e.g. if they only have S9)."""
-    params = {
-        "UserId": user_id,
-        "Fields": "Name,ParentIndexNumber,IndexNumber"
-    }
     try:
-        r = client.SESSION.get(f"{client.EMBY_URL}/Shows/{series_id}/Episodes",
-                               params=params, headers=hdr, timeout=15)
-        r.raise_for_status()
-
-        all_eps = sorted(r.json().get("Items", []),
-                         key=lambda x: (x.get("ParentIndexNumber") or 0,
-                                        x.get("IndexNumber") or 0))
-
-        for ep in all_eps:
-            if ep.get("ParentIndexNumber", 0) > 0:
-                return ep
-
+        return get_episode_index(series_id, user_id, hdr).first()
     except Exception as e:
         logger.warning(f"TV: Failed to find first available episode for series {series_id}: {e}")
 
@@ -137,24 +189,8 @@ def get_first_available_episode(series_id: str, user_id: str, hdr: Dict[str, str
 def get_first_unwatched_episode(series_id: str, user_id: str,
                                 hdr: Dict[str, str]) -> Optional[Dict]:
     """Finds the first unwatched episode for a series for a given user."""
-    params = {
-        "UserId": user_id,
-        "IsPlayed": "false",
-        "Fields": "Name,UserData,ParentIndexNumber,IndexNumber,DateCreated"
-    }
     try:
-        r = client.SESSION.get(f"{client.EMBY_URL}/Shows/{series_id}/Episodes",
-                               params=params, headers=hdr, timeout=15)
-        r.raise_for_status()
-
-        all_eps = sorted(r.json().get("Items", []),
-                         key=lambda x: (x.get("ParentIndexNumber") or 0,
-                                        x.get("IndexNumber") or 0))
-
-        for ep in all_eps:
-            if ep.get("ParentIndexNumber", 0) > 0:
-                return ep
-
+        return get_episode_index(series_id, user_id, hdr).first(only_unwatched=True)
     except Exception as e:
         logger.warning(f"TV: Failed to find unwatched episodes for series {series_id}: {e}")
 
@@ -163,37 +199,12 @@ def get_first_unwatched_episode(series_id: str, user_id: str,
 def get_random_unwatched_episode(series_id: str, user_id: str,
                                  hdr: Dict[str, str]) -> Optional[Dict]:
     """Finds a random unwatched episode for a series for a given user."""
-    params = {
-        "UserId": user_id,
-        "IsPlayed": "false",
-        "SortBy": "Random",
-        "Limit": 20,
-        "Fields": "UserData,ParentIndexNumber,IndexNumber"
-    }
     try:
-        r = client.SESSION.get(f"{client.EMBY_URL}/Shows/{series_id}/Episodes",
-                               params=params, headers=hdr, timeout=15)
-        r.raise_for_status()
-        all_eps = r.json().get("Items", [])
-
-        valid_eps = [ep for ep in all_eps if ep.get("ParentIndexNumber", 0) > 0]
-
-        if valid_eps:
-            random_ep = valid_eps[0]
-            return {
-                "season": random_ep.get("ParentIndexNumber", 1),
-                "episode": random_ep.get("IndexNumber", 1)
-            }
-
-        params.pop("IsPlayed")
-        r = client.SESSION.get(f"{client.EMBY_URL}/Shows/{series_id}/Episodes",
-                               params=params, headers=hdr, timeout=15)
-        r.raise_for_status()
-        all_eps = r.json().get("Items", [])
-        valid_eps = [ep for ep in all_eps if ep.get("ParentIndexNumber", 0) > 0]
+        index = get_episode_index(series_id, user_id, hdr)
+        valid_eps = index.regular(only_unwatched=True) or index.regular()
 
         if valid_eps:
-            random_ep = valid_eps[0]
+            random_ep = random.choice(valid_eps)
             return {
                 "season": random_ep.get("ParentIndexNumber", 1),
                 "episode": random_ep.get("IndexNumber", 1)
@@ -228,4 +239,5 @@ def mark_unplayed(series_id: str, user_id: str, hdr: Dict[str, str], season_numb
     logger.info(f"Marking item {target_id} as unplayed for user {user_id}")
     r = client.SESSION.delete(f"{client.EMBY_URL}/Users/{user_id}/PlayedItems/{target_id}", headers=hdr, timeout=10)
     r.raise_for_status()
+    invalidate_episode_cache(series_id=series_id)
     return True
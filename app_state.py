@@ -28,11 +28,14 @@ AI_PROVIDER = "gemini"
 OLLAMA_URL = "http://localhost:11434"
 OLLAMA_MODEL = "qwen2.5:7b"
 OLLAMA_TIMEOUT = 120
+OLLAMA_NUM_PARALLEL = max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", 2)))
 STARRED_MODELS = []
 VERBOSE_LOGGING = False
 EXTERNAL_API_KEY = None
 
 CACHE_REFRESH_MINUTES = 15
+BUILDER_MAX_WORKERS = 4
+BUILDER_SHOW_WORKERS = 4
 SERVER_TYPE = "emby"
 SERVER_ID = None
 
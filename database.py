@@ -56,5 +56,107 @@ def init_db():
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS movie_index (
+                user_id TEXT NOT NULL,
+                id TEXT NOT NULL,
+                name TEXT,
+                sort_name TEXT,
+                premiere_date TEXT,
+                year INTEGER,
+                date_created TEXT,
+                runtime_ticks INTEGER,
+                played INTEGER NOT NULL DEFAULT 0,
+                date_last_saved TEXT,
+                PRIMARY KEY (user_id, id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_movie_index_year ON movie_index (user_id, year)")
+
+        for table, column in (("movie_index_libraries", "library_id"), ("movie_index_genres", "genre"), ("movie_index_studios", "studio")):
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    user_id TEXT NOT NULL,
+                    {column} TEXT NOT NULL,
+                    movie_id TEXT NOT NULL,
+                    PRIMARY KEY (user_id, {column}, movie_id)
+                )
+            """)
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_movie ON {table} (user_id, movie_id)")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS movie_index_people (
+                user_id TEXT NOT NULL,
+                person_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                person_type TEXT NOT NULL,
+                movie_id TEXT NOT NULL,
+                PRIMARY KEY (user_id, person_id, name, person_type, movie_id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_movie_index_people_name ON movie_index_people (user_id, name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_movie_index_people_movie ON movie_index_people (user_id, movie_id)")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS library_stats (
+                media_type TEXT PRIMARY KEY,
+                total INTEGER NOT NULL DEFAULT 0,
+                enriched INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vector_source_stamps (
+                item_id TEXT PRIMARY KEY,
+                stamp TEXT NOT NULL
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vibe_tags (
+                tag TEXT PRIMARY KEY,
+                frequency INTEGER NOT NULL DEFAULT 0,
+                item_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_vibe_tags_item_count ON vibe_tags (item_count)")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS enrichment_queue (
+                item_id TEXT PRIMARY KEY,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                added_at REAL,
+                updated_at REAL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_enrichment_queue_claim ON enrichment_queue (status, priority DESC, added_at DESC)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS enrichment_budget (
+                hour INTEGER PRIMARY KEY,
+                requests INTEGER NOT NULL DEFAULT 0,
+                tokens INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                dim INTEGER NOT NULL
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS movie_index_sync (
+                user_id TEXT PRIMARY KEY,
+                last_sync TEXT,
+                item_count INTEGER
+            )
+        """)
+
         conn.commit()
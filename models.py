@@ -61,6 +61,10 @@ class QuickPlaylistScheduleData(BaseModel):
 class EnrichmentScheduleData(BaseModel):
     batch_size: int = Field(default=15, ge=1, le=500)
     timeout: int = Field(default=120, ge=10, le=600)
+    titles_per_prompt: int = Field(default=5, ge=1, le=20)
+    concurrency: int = Field(default=2, ge=1, le=16)
+    max_requests_per_hour: int = Field(default=0, ge=0)
+    max_tokens_per_hour: int = Field(default=0, ge=0)
 
 class ScheduleRequest(BaseModel):
     job_type: str
@@ -2,6 +2,7 @@
 routers/builder.py – APIRouter
 """
 
+import asyncio
 import logging
 import random
 from typing import Dict, List, Optional
@@ -10,6 +11,7 @@ from fastapi import APIRouter, HTTPException, Depends
 import app as core
 import models
 import app_state
+from app import movie_index
 from app.cache import get_library_data
 from app.ai import generate_smart_blocks
 from preset_manager import preset_manager
@@ -157,6 +159,9 @@ def api_movies_preview_count(req: models.MovieFinderRequest, auth_deps: dict = D
         filters = req.filters.copy()
         filters['duration_minutes'] = None
         filters['limit'] = None
+        local_count = movie_index.count_movies(req.user_id, filters)
+        if local_count is not None:
+            return {"count": local_count}
         found_movies = core.find_movies(user_id=req.user_id, filters=filters, hdr=user_specific_hdr)
         return {"count": len(found_movies)}
     except Exception as e:
@@ -168,18 +173,22 @@ def api_music_preview_count(req: models.MusicFinderRequest, auth_deps: dict = De
         user_specific_hdr = core.auth_headers(auth_deps["token"], req.user_id)
         filters = req.filters.copy()
         filters['limit'] = None
-        found_songs = core.find_songs(user_id=req.user_id, filters=filters, hdr=user_specific_hdr)
-        return {"count": len(found_songs)}
+        count, genre_mode = core.count_songs(user_id=req.user_id, filters=filters, hdr=user_specific_hdr)
+        return {"count": count, "genre_mode": genre_mode}
     except Exception as e:
         raise HTTPException(400, str(e))
 
 @router.post("/api/builder/preview")
-def api_builder_preview(req: models.BuilderPreviewRequest, auth_deps: dict = Depends(get_current_auth_headers)):
+async def api_builder_preview(req: models.BuilderPreviewRequest, auth_deps: dict = Depends(get_current_auth_headers)):
     try:
         user_specific_hdr = core.auth_headers(auth_deps["token"], req.user_id)
-        items = core.generate_items_from_blocks(req.user_id, req.blocks, user_specific_hdr, [])
+        timings = []
+        # Block generation fans out on its own worker pool; keep it off the shared request threadpool.
+        items = await asyncio.to_thread(
+            core.generate_items_from_blocks, req.user_id, req.blocks, user_specific_hdr, [], timings=timings
+        )
         formatted_items = core.format_items_for_preview(items)
-        return {"status": "ok", "data": formatted_items}
+        return {"status": "ok", "data": formatted_items, "timings": timings}
     except Exception as e:
         logging.error(f"Error generating playlist preview: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"An error occurred while generating the preview: {e}")
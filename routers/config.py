@@ -16,7 +16,7 @@ import app as core
 import models
 import app_state
 import database
-from app.ai.vector_store import get_vector_space, reset_media_collection, index_library_for_vibes
+from app.ai.vector_store import get_vector_space, reset_media_collection, index_library_for_vibes, get_index_report, get_search_cache_stats
 from .dependencies import get_current_auth_headers
 
 router = APIRouter()
@@ -60,6 +60,21 @@ def api_get_settings():
         "vector_space": get_vector_space()
     }
 
+@router.get("/api/system/http_pool")
+def api_http_pool_stats(auth_deps: dict = Depends(get_current_auth_headers)):
+    """Returns media server connection pool utilisation and in-flight limiter counters."""
+    return core.get_pool_stats()
+
+@router.get("/api/vector/search_cache")
+def api_vector_search_cache(auth_deps: dict = Depends(get_current_auth_headers)):
+    """Returns size and hit/miss counters of the vibe search query-embedding and result caches."""
+    return get_search_cache_stats()
+
+@router.get("/api/vector/index_report")
+def api_vector_index_report(auth_deps: dict = Depends(get_current_auth_headers)):
+    """Returns the status, duration and throughput of the last AI library indexing run."""
+    return get_index_report() or {"status": "never"}
+
 @router.get("/api/ollama/status")
 def api_ollama_status():
     """Proxies request to Ollama to get installed and running models."""
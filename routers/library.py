@@ -2,31 +2,67 @@
 routers/library.py – APIRouter
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, List
-from fastapi import APIRouter, HTTPException, Depends, Body
+from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Body, Request, Response
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 import app as core
 import models
 import app_state
-from app.cache import get_library_data
-from app.ai.vector_store import calculate_library_iq, media_collection, get_discovery_tags
+from app.cache import get_library_data, get_cache_status, get_encoded_payload, CACHE_SECTIONS
+from app import title_index
+from app.ai import enrichment_queue, tag_vocabulary
+from app.ai.vector_store import calculate_library_iq, get_discovery_tags, load_title_index
 from .dependencies import get_current_auth_headers
 
 router = APIRouter()
 
-@router.get("/api/library_data")
-def api_library_data(auth_deps: dict = Depends(get_current_auth_headers)) -> Dict[str, Any]:
-    """Returns a consolidated dictionary of all necessary library data for the UI."""
-    cached_data = get_library_data()
-    if not cached_data:
+def _library_payload_response(request: Request, section: Optional[str] = None) -> Response:
+    payload = get_encoded_payload(section, request.headers.get("accept-encoding", ""))
+    if payload is None:
         raise HTTPException(
             status_code=503,
             detail="Library data is not yet available. The cache may still be warming up. Please try again in a moment."
         )
-    return cached_data
+
+    body, encoding, etag = payload
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "X-MixerBee-Cache": "stale" if get_cache_status()["stale"] else "fresh",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/api/library_data")
+def api_library_data(request: Request, auth_deps: dict = Depends(get_current_auth_headers)) -> Response:
+    """
+    Returns a consolidated dictionary of all necessary library data for the UI.
+    The body is serialized and compressed once per cache generation and served with a strong
+    ETag; data loaded from the on-disk snapshot is flagged with X-MixerBee-Cache: stale.
+    """
+    return _library_payload_response(request)
+
+@router.get("/api/library_data/{section}")
+def api_library_data_section(section: str, request: Request, auth_deps: dict = Depends(get_current_auth_headers)) -> Response:
+    """Returns a single library data section (e.g. artistData) so tabs can lazy-load what they need."""
+    if section not in CACHE_SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown library data section '{section}'.")
+    return _library_payload_response(request, section)
+
+@router.get("/api/cache/status")
+def api_cache_status(auth_deps: dict = Depends(get_current_auth_headers)) -> Dict[str, Any]:
+    """Reports snapshot staleness and the mode, sections and bytes transferred of the last refresh."""
+    return get_cache_status()
 
 @router.get("/api/library/iq")
 def api_library_iq(auth_deps: dict = Depends(get_current_auth_headers)) -> JSONResponse:
@@ -41,12 +77,28 @@ def api_library_iq(auth_deps: dict = Depends(get_current_auth_headers)) -> JSONR
         }
     )
 
+@router.get("/api/enrichment/status")
+def api_enrichment_status(auth_deps: dict = Depends(get_current_auth_headers)):
+    """Enrichment queue progress, recent failures and this hour's budget usage."""
+    return enrichment_queue.get_status()
+
+@router.post("/api/enrichment/retry_failed")
+def api_enrichment_retry_failed(auth_deps: dict = Depends(get_current_auth_headers)):
+    """Re-queues items that exhausted their enrichment attempts."""
+    count = enrichment_queue.retry_failed()
+    return {"status": "ok", "log": [f"Re-queued {count} failed items for enrichment."]}
+
 @router.get("/api/library/mood_discovery")
-def api_mood_discovery(auth_deps: dict = Depends(get_current_auth_headers)):
-    """Returns a random sampling of vibe tags from the enriched library."""
-    tags = get_discovery_tags(limit=60)
+def api_mood_discovery(weighted: bool = False, auth_deps: dict = Depends(get_current_auth_headers)):
+    """Returns a random sampling of vibe tags from the enriched library, optionally weighted by usage."""
+    tags = get_discovery_tags(limit=60, weighted=weighted)
     return {"status": "ok", "tags": tags}
 
+@router.get("/api/library/tags/suggest")
+def api_suggest_tags(prefix: str, limit: int = 10, auth_deps: dict = Depends(get_current_auth_headers)):
+    """Vibe tag autocompletion from the tag vocabulary."""
+    return {"status": "ok", "tags": tag_vocabulary.suggest(prefix, limit=limit)}
+
 @router.get("/api/default_user")
 def api_default_user(auth_deps: dict = Depends(get_current_auth_headers)) -> Dict[str, str]:
     return {"id": app_state.DEFAULT_UID, "name": app_state.DEFAULT_USER_NAME}
@@ -109,48 +161,20 @@ def api_get_studios(name: str = "", auth_deps: dict = Depends(get_current_auth_h
     return core.get_studios(name, library_data)
 
 @router.get("/api/media/search")
-def api_search_media(query: str, auth_deps: dict = Depends(get_current_auth_headers)) -> List[Dict[str, Any]]:
-    """Global search for any media (movies/shows) in the vector store + Collections."""
+async def api_search_media(query: str, auth_deps: dict = Depends(get_current_auth_headers)) -> List[Dict[str, Any]]:
+    """Global typeahead search for movies, shows and Collections, served from the in-memory title index."""
     try:
-        res = media_collection.get(
-            include=["metadatas"]
-        )
-        
-        search_term = query.lower()
-        results = []
-
-        # 1. Search Native Collections first
-        try:
-            collections = core.get_collections(auth_deps["login_uid"], auth_deps["hdr"])
-            for c in collections:
-                if search_term in c.get("Name", "").lower():
-                    results.append({
-                        "Id": c.get("Id"),
-                        "Name": c.get("Name"),
-                        "Year": "",
-                        "Type": "Collection"
-                    })
-        except Exception as ce:
-            logging.warning(f"Failed to fetch collections for search: {ce}")
-
-        # 2. Search Local Vector DB Movies/Shows
-        if res and res.get('ids'):
-            for i, item_id in enumerate(res['ids']):
-                meta = res['metadatas'][i]
-                name = meta.get("name", "Unknown")
-
-                if search_term in name.lower():
-                    results.append({
-                        "Id": item_id,
-                        "Name": name,
-                        "Year": meta.get("year", ""),
-                        "Type": meta.get("type", "")
-                    })
-
-                    if len(results) >= 15:
-                        break
-
-        return results
+        if not title_index.is_media_loaded():
+            await asyncio.to_thread(load_title_index)
+
+        if title_index.collections_stale():
+            try:
+                title_index.set_collections(await core.aget_collections(auth_deps["login_uid"], auth_deps["hdr"]))
+            except Exception as ce:
+                title_index.defer_collections()
+                logging.warning(f"Failed to fetch collections for search: {ce}")
+
+        return title_index.search(query, limit=15)
     except Exception as e:
         logging.error(f"Media search failed: {e}")
         return []
@@ -7,6 +7,7 @@ from fastapi import APIRouter, Request
 from typing import Dict, Any, Set
 
 import app_state
+from app import tv, movie_index
 from scheduler import scheduler_manager
 from app.logger import get_logger
 
@@ -120,8 +121,23 @@ async def handle_media_webhook(request: Request):
     ]
 
     if any(keyword in event_type_lower for keyword in relevant_keywords):
-        
+        if target_media_type in (None, "tv"):
+            item = payload.get("Item", {})
+            series_id = item.get("SeriesId") or (item.get("Id") if item_type == "Series" else None)
+            tv.invalidate_episode_cache(user_id=user_id, series_id=series_id)
+
         run_time = datetime.now() + timedelta(seconds=10)
+
+        if target_media_type in (None, "movie"):
+            scheduler_manager.scheduler.add_job(
+                func=movie_index.refresh_movie_index,
+                trigger='date',
+                run_date=run_time,
+                id="webhook_movie_index_sync",
+                name="Debounced Movie Index Sync",
+                replace_existing=True
+            )
+
         job_id = f"webhook_debounce_{user_id}_{target_media_type or 'all'}"
 
         logger.info(f"Event matches triggers! Scheduling debounce rebuild for 10s from now.")
@@ -57,8 +57,17 @@ def run_playlist_job(**schedule_data) -> Dict:
             enrich_data = schedule_data.get("enrichment_data", {})
             batch_size = enrich_data.get("batch_size", 15)
             timeout = enrich_data.get("timeout", 120)
-            
-            result = process_enrichment_queue(batch_size=batch_size, timeout=timeout)
+            titles_per_prompt = enrich_data.get("titles_per_prompt", 5)
+            concurrency = enrich_data.get("concurrency", 2)
+
+            result = process_enrichment_queue(
+                batch_size=batch_size,
+                timeout=timeout,
+                titles_per_prompt=titles_per_prompt,
+                concurrency=concurrency,
+                max_requests_per_hour=enrich_data.get("max_requests_per_hour", 0),
+                max_tokens_per_hour=enrich_data.get("max_tokens_per_hour", 0)
+            )
             
         else:
             import preset_manager as pm
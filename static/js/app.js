@@ -37,6 +37,30 @@ const hydrateStores = () => {
     Alpine.store('presets').init();
 };
 
+const INDEX_REPORT_SEEN_KEY = 'mixerbeeLastIndexReport';
+
+async function watchIndexReport() {
+    try {
+        const report = await post('api/vector/index_report', null, null, 'GET', true, false);
+        if (!report || report.status === 'never') return;
+        if (report.status === 'running') {
+            setTimeout(watchIndexReport, 30000);
+            return;
+        }
+        if (localStorage.getItem(INDEX_REPORT_SEEN_KEY) === report.finished_at) return;
+        localStorage.setItem(INDEX_REPORT_SEEN_KEY, report.finished_at);
+
+        if (report.status === 'ok') {
+            const rate = report.items_per_second ? ` (${report.items_per_second} items/s)` : '';
+            toast(`AI library index updated: ${report.added} added, ${report.updated || 0} changed, ${report.removed} removed in ${report.seconds}s${rate}.`, true);
+        } else {
+            toast(`AI library indexing failed: ${report.error || 'unknown error'}`, false);
+        }
+    } catch (e) {
+        console.error("Index report check failed:", e.message);
+    }
+}
+
 async function initializeApp() {
     if (isAppInitialized) return;
     isAppInitialized = true;
@@ -97,6 +121,8 @@ async function initializeApp() {
             Object.assign(Alpine.store('mixer').library, libraryData);
             await Alpine.store('presets').refresh();
 
+            if (config.is_ai_configured) watchIndexReport();
+
         } catch (err) {
             console.error("Initialization Error:", err.message);
             toast('Initialization error. Check settings.', false);
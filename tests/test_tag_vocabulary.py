@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("chromadb")
+
+import database
+from app.ai import tag_vocabulary
+
+
+class CountingCollection:
+    def __init__(self, metadatas):
+        self.metadatas = metadatas
+        self.get_calls = 0
+
+    def get(self, where=None, include=None):
+        self.get_calls += 1
+        flag = where.get("is_enriched") if where else None
+        return {"metadatas": [m for m in self.metadatas if m.get("is_enriched") == flag]}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "mixerbee.db")
+    database.init_db()
+
+
+def test_ensure_built_rebuilds_only_once(db):
+    collection = CountingCollection([{"is_enriched": True, "vibe_tags": "cozy, dark"}])
+
+    tag_vocabulary.ensure_built(collection, enriched_count=1)
+    scans = collection.get_calls
+    assert scans > 0
+
+    tag_vocabulary.ensure_built(collection, enriched_count=1)
+    assert collection.get_calls == scans
+
+
+def test_clear_forgets_the_built_flag(db):
+    collection = CountingCollection([{"is_enriched": True, "vibe_tags": "cozy"}])
+    tag_vocabulary.ensure_built(collection, enriched_count=1)
+    tag_vocabulary.clear()
+
+    scans = collection.get_calls
+    tag_vocabulary.ensure_built(collection, enriched_count=1)
+    assert collection.get_calls > scans
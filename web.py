@@ -17,7 +17,8 @@ from app.ai.vector_store import index_library_for_vibes, ensure_cosine_similarit
 import scheduler
 import app_state
 import database
-from app.cache import refresh_cache
+from app.cache import start_background_refresh, load_snapshot
+from app.client import close_async_client
 from routers import config, builder, library, quick_playlists, presets
 from routers import scheduler as scheduler_router
 from routers import webhooks
@@ -40,7 +41,8 @@ async def lifespan(app: FastAPI):
             "token": app_state.token,
             "login_uid": app_state.login_uid
         }
-        refresh_cache(auth_details)
+        load_snapshot(app_state.SERVER_ID, app_state.login_uid)
+        start_background_refresh(auth_details)
 
         ai_enabled = bool(app_state.GEMINI_API_KEY) or (app_state.AI_PROVIDER == "ollama")
         
@@ -56,6 +58,7 @@ async def lifespan(app: FastAPI):
     yield
 
     scheduler.scheduler_manager.scheduler.shutdown()
+    await close_async_client()
 
 app = FastAPI(title="MixerBee API", root_path=ROOT_PATH, lifespan=lifespan)
 